@@ -3,7 +3,12 @@
 ## Author - Ryan Brosius
 ## Date - 9/1/2022
 
+import json
+import os
 import random
+import time
+from array import array
+from ChessBitboard import PIECE_NAMES, SQUARES
 
 pieceScores ={"K": 0,
               "Q": 90,
@@ -13,7 +18,132 @@ pieceScores ={"K": 0,
               "P": 10}
 CHECKMATE = 1000
 STALEMATE = 0
-DEPTH = 2
+DRAW = 0    #Repetition or the fifty move rule
+DEPTH = 2   #Depth searched when findBestMove isn't given a time or node budget
+MAX_DEPTH = 64  #Deepest iteration tried when searching on a budget
+DELTA_MARGIN = 20   #Quiescence skips captures that can't get within two pawns of alpha
+HASH_SIZE_MB = 16   #Memory cap for the transposition table
+
+#Transposition table bound types
+EXACT = 0
+LOWER_BOUND = 1  #Search failed high, real score is at least this
+UPPER_BOUND = 2  #Search failed low, real score is at most this
+
+#Fixed size hash table of searched positions, keyed on GameState.getZobristKey()
+#Entries are packed into two 64 bit ints (key and data) so the memory used is fixed at creation
+#Each bucket has a depth-preferred slot and an always-replace slot
+#buffer can be any writable buffer of getBytes(sizeMB) bytes, like a multiprocessing.shared_memory block shared by searches
+class TranspositionTable():
+    ENTRY_BYTES = 16
+    SCORE_SCALE = 100   #Scores are floats (location tables use halves), stored as fixed point
+
+    def __init__(self, sizeMB = HASH_SIZE_MB, buffer = None):
+        self.__buckets = self.getBytes(sizeMB) // (self.ENTRY_BYTES * 2)
+        if buffer is None:
+            self.__table = array("Q", bytes(self.getBytes(sizeMB)))   #key, data, key, data...
+        else:
+            self.__table = memoryview(buffer)[:self.getBytes(sizeMB)].cast("Q")
+        self.__age = 0
+
+    @staticmethod
+    def getBytes(sizeMB):
+        return max(1, sizeMB * 1024 * 1024 // (TranspositionTable.ENTRY_BYTES * 2)) * TranspositionTable.ENTRY_BYTES * 2
+
+    def getSizeMB(self):
+        return self.__buckets * 2 * self.ENTRY_BYTES / (1024 * 1024)
+
+    def clear(self):
+        for i in range(len(self.__table)):
+            self.__table[i] = 0
+        self.__age = 0
+
+    def newSearch(self):    #Entries from older searches can be replaced even if they are deeper
+        self.__age = (self.__age + 1) & 0x3F
+
+    #data layout: score (32 bits) | depth (8 bits) | bound (2 bits) | moveID (16 bits) | age (6 bits)
+    def store(self, key, depth, score, bound, moveID):
+        table = self.__table
+        index = (key % self.__buckets) * 4
+        oldData = table[index + 1]
+        sameKey = table[index] ^ oldData == key
+        if sameKey or depth >= (oldData >> 32) & 0xFF or (oldData >> 58) != self.__age:
+            if not sameKey and oldData:  #Keep the entry being pushed out in the always-replace slot
+                table[index + 2] = table[index]
+                table[index + 3] = oldData
+        else:
+            index += 2
+        data = ((int(round(score * self.SCORE_SCALE)) + (1 << 31)) & 0xFFFFFFFF) | (min(depth, 0xFF) << 32) | \
+               (bound << 40) | ((moveID & 0xFFFF) << 42) | (self.__age << 58)
+        table[index] = key ^ data   #Key is stored xored with the data so an entry half written by another process never matches
+        table[index + 1] = data
+
+    def lookup(self, key):  #Returns (depth, score, bound, moveID), or None if the position isn't stored
+        table = self.__table
+        index = (key % self.__buckets) * 4
+        for i in (index, index + 2):
+            data = table[i + 1]
+            if data and table[i] ^ data == key:
+                score = ((data & 0xFFFFFFFF) - (1 << 31)) / self.SCORE_SCALE
+                return (data >> 32) & 0xFF, score, (data >> 40) & 0x3, (data >> 42) & 0xFFFF
+        return None
+
+    def release(self):  #Drops the view of a shared buffer so its owner can close it
+        if isinstance(self.__table, memoryview):
+            self.__table.release()
+
+EVAL_CACHE_ENTRIES = 1 << 16    #Positions kept by the evaluation cache, rounded up to a power of two
+
+#Direct mapped cache of static scores keyed on GameState.getZobristKey(), a new position just takes over its slot
+class EvalCache():
+    def __init__(self, entries = EVAL_CACHE_ENTRIES):
+        size = 1 << max(0, (entries - 1).bit_length())
+        self.__mask = size - 1
+        self.__keys = array("Q", bytes(8 * size))
+        self.__scores = array("d", bytes(8 * size))
+        self.__hits = 0
+        self.__misses = 0
+
+    def getEntries(self):
+        return self.__mask + 1
+
+    def getHits(self):
+        return self.__hits
+
+    def getMisses(self):
+        return self.__misses
+
+    def getHitRate(self):
+        lookups = self.__hits + self.__misses
+        return self.__hits / lookups if lookups else 0
+
+    def resetCounters(self):
+        self.__hits = 0
+        self.__misses = 0
+
+    def clear(self):
+        for i in range(len(self.__keys)):
+            self.__keys[i] = 0
+        self.resetCounters()
+
+    def lookup(self, key):  #Returns the stored score, or None if the position isn't stored
+        index = key & self.__mask
+        if self.__keys[index] == key:
+            self.__hits += 1
+            return self.__scores[index]
+        self.__misses += 1
+        return None
+
+    def store(self, key, score):
+        index = key & self.__mask
+        self.__keys[index] = key
+        self.__scores[index] = score
+
+evalCache = EvalCache()
+
+#Move ordering, searching the likely best moves first lets alpha-beta cut off more of the tree
+HASH_MOVE_ORDER = 1000000
+CAPTURE_ORDER = 100000
+KILLER_ORDER = (90000, 80000)
 
 def findRandomMove(validMoves):
     return validMoves[random.randint(0, len(validMoves)-1)]
@@ -50,15 +180,368 @@ def findBestMoveMinMax(gs, validMoves, returnQueue):
         gs.undoMove()
     returnQueue.put(bestPlayerMove)
 
-def findBestMove(gs, validMoves, returnQueue):
-    global nextMove, counter
-    nextMove = None
-    random.shuffle(validMoves)
-    counter = 0
-    #findMoveMinMax(gs, validMoves, DEPTH, gs.getWhiteToMove())
-    findMoveNegaMaxAlphaBeta(gs, validMoves, DEPTH, -CHECKMATE, CHECKMATE, 1 if gs.getWhiteToMove() else -1)
-    print(counter)
-    returnQueue.put(nextMove)
+#Raised inside the search once the time or node budget runs out, or the search is stopped
+class SearchTimeout(Exception):
+    pass
+
+SEARCH_LOG = os.environ.get("CHESS_SEARCH_LOG")     #If set, the default searcher appends the stats of every search to this file
+
+#Statistics for one search, filled in by Searcher.iterativeDeepening and read back with Searcher.getStats()
+class SearchStats():
+    def __init__(self, fen = ""):
+        self.fen = fen      #Position searched
+        self.bestMove = ""
+        self.score = 0      #For the side to move, from the deepest finished iteration
+        self.depth = 0
+        self.nodes = 0      #Every node, quiescence nodes included
+        self.quiescenceNodes = 0
+        self.seconds = 0
+        self.cutoffs = 0
+        self.firstMoveCutoffs = 0
+        self.hashProbes = 0
+        self.hashHits = 0
+        self.principalVariation = []
+        self.iterations = []    #One dict per finished iteration: depth, score, nodes, seconds, pv
+        self.fromBook = False   #Move came from the opening book, nothing was searched
+
+    def getNodesPerSecond(self):
+        return self.nodes / self.seconds if self.seconds else 0
+
+    def getFirstMoveCutoffRate(self):
+        return self.firstMoveCutoffs / self.cutoffs if self.cutoffs else 0
+
+    def getHashHitRate(self):
+        return self.hashHits / self.hashProbes if self.hashProbes else 0
+
+    def toDict(self):
+        stats = dict(vars(self))
+        stats["nodesPerSecond"] = self.getNodesPerSecond()
+        stats["firstMoveCutoffRate"] = self.getFirstMoveCutoffRate()
+        stats["hashHitRate"] = self.getHashHitRate()
+        return stats
+
+    def __str__(self):
+        if self.fromBook:
+            return "book move %s" % self.bestMove
+        return "depth %d score %.2f %s | %d nodes (%d quiescence) in %.2fs, %.0f nodes/sec | first move cutoffs %.2f, hash hits %.2f | pv %s" % \
+               (self.depth, self.score, self.bestMove, self.nodes, self.quiescenceNodes, self.seconds, self.getNodesPerSecond(),
+                self.getFirstMoveCutoffRate(), self.getHashHitRate(), " ".join(self.principalVariation))
+
+#Holds everything one search needs (node counter, budget, killers, history, hash table), so several
+#searches can run side by side. Killers and history carry over between searches of the same Searcher
+class Searcher():
+    def __init__(self, table = None, statsLog = None):
+        self.__transpositionTable = table if table is not None else TranspositionTable()
+        self.__statsLog = statsLog     #Path of a JSON lines file every search's stats are appended to, or None
+        self.__onIteration = None      #Called with the iteration dict (see SearchStats.iterations) after every finished depth
+        self.__openingBook = None      #ChessBook.OpeningBook probed before searching, or None
+        self.__stats = SearchStats()
+        self.__startTime = 0
+        self.__quiescenceNodes = 0
+        self.__hashProbes = 0
+        self.__hashHits = 0
+        self.__killerMoves = [[0, 0] for ply in range(MAX_DEPTH + 1)]  #Two quiet moves per ply that caused a beta cutoff, by moveID
+        self.__historyTable = [0] * 4096   #How often a quiet move caused a cutoff, weighted by depth, by the from/to bits of the moveID
+        self.__counter = 0
+        self.__cutoffs = 0
+        self.__firstMoveCutoffs = 0    #Cutoffs caused by the first move searched, a good ordering gets this close to cutoffs
+        self.__nextMove = None
+        self.__rootDepth = DEPTH
+        self.__completedDepth = 0  #Depth of the last iteration that finished, and its score for the side to move
+        self.__bestScore = 0
+        self.__deadline = None
+        self.__maxNodes = None
+        self.__stopEvent = None    #multiprocessing.Event another process can set to cancel the search
+
+    def getTranspositionTable(self):
+        return self.__transpositionTable
+
+    def getNodes(self):
+        return self.__counter
+
+    def getCompletedDepth(self):
+        return self.__completedDepth
+
+    def getBestScore(self):
+        return self.__bestScore
+
+    def getFirstMoveCutoffRate(self):
+        return self.__firstMoveCutoffs / self.__cutoffs if self.__cutoffs else 0
+
+    def getStats(self):     #SearchStats of the last iterativeDeepening search
+        return self.__stats
+
+    def setStatsLog(self, path):
+        self.__statsLog = path
+
+    def setIterationCallback(self, callback):
+        self.__onIteration = callback
+
+    def setOpeningBook(self, book):
+        self.__openingBook = book
+
+    #Sets up a new search, rootDepth is the depth findMoveNegaMaxAlphaBeta will be called with at the root
+    def startSearch(self, rootDepth, timeLimit = None, nodeLimit = None, stop = None):
+        self.__counter = 0
+        self.__quiescenceNodes = 0
+        self.__hashProbes = 0
+        self.__hashHits = 0
+        self.__startTime = time.perf_counter()
+        self.__rootDepth = rootDepth
+        self.__deadline = time.perf_counter() + timeLimit if timeLimit is not None else None
+        self.__maxNodes = nodeLimit
+        self.__stopEvent = stop
+        self.__completedDepth = 0
+        self.__bestScore = 0
+        self.__transpositionTable.newSearch()
+        self.resetMoveOrdering()
+
+    def outOfBudget(self):  #Checked every 64 nodes so the clock and the stop event aren't read at every node
+        return (self.__deadline is not None and time.perf_counter() > self.__deadline) or \
+               (self.__maxNodes is not None and self.__counter >= self.__maxNodes) or \
+               (self.__stopEvent is not None and self.__stopEvent.is_set())
+
+    #Order: hash move, captures by most valuable victim / least valuable attacker, killer moves, then history
+    def orderMoves(self, validMoves, ply, hashMoveID):
+        killers = self.__killerMoves[ply]
+        historyTable = self.__historyTable
+        def orderScore(move):
+            moveID = move.getMoveID()
+            if moveID == hashMoveID:
+                return HASH_MOVE_ORDER
+            captured = move.getPieceCaptured()
+            if captured != "--":
+                return CAPTURE_ORDER + 10 * pieceScores[captured[1]] - pieceScores[move.getPieceMoved()[1]]
+            if move.isPawnPromotion() and move.getPromotion() == 0:     #Underpromotions are ordered like quiet moves
+                return CAPTURE_ORDER
+            if moveID == killers[0]:
+                return KILLER_ORDER[0]
+            if moveID == killers[1]:
+                return KILLER_ORDER[1]
+            return min(historyTable[moveID & 0xFFF], KILLER_ORDER[1] - 1)
+        return sorted(validMoves, key=orderScore, reverse=True)
+
+    def updateMoveOrdering(self, move, depth, ply):   #Remembers a quiet move that caused a beta cutoff
+        moveID = move.getMoveID()
+        killers = self.__killerMoves[ply]
+        if killers[0] != moveID:
+            killers[1] = killers[0]
+            killers[0] = moveID
+        self.__historyTable[moveID & 0xFFF] += depth * depth
+
+    def resetMoveOrdering(self):    #Killers only make sense within one search, history is aged so newer results count more
+        for killers in self.__killerMoves:
+            killers[0] = killers[1] = 0
+        historyTable = self.__historyTable
+        for i in range(len(historyTable)):
+            historyTable[i] //= 2
+        self.__cutoffs = 0
+        self.__firstMoveCutoffs = 0
+
+    #Searches depth 1, 2, 3... until maxDepth or the budget runs out, returns the best move of the last finished depth
+    def iterativeDeepening(self, gs, validMoves, maxDepth, timeLimit = None, nodeLimit = None, stop = None, startDepth = 1):
+        random.shuffle(validMoves)
+        self.startSearch(startDepth, timeLimit, nodeLimit, stop)
+        self.__stats = SearchStats(gs.toFen())
+        if len(validMoves) <= 1:
+            return self.finishStats(gs, validMoves[0] if validMoves else None)
+        if self.__openingBook is not None:
+            bookMove = self.__openingBook.getMove(gs, validMoves)
+            if bookMove is not None:
+                self.__stats.fromBook = True
+                return self.finishStats(gs, bookMove)
+
+        bestMove = None
+        moveLogLength = len(gs.getMoveLog())
+        for depth in range(startDepth, maxDepth + 1):
+            self.__nextMove = None
+            self.__rootDepth = depth
+            iterationStart = time.perf_counter()
+            try:
+                #findMoveMinMax(gs, validMoves, DEPTH, gs.getWhiteToMove())
+                score = self.findMoveNegaMaxAlphaBeta(gs, validMoves, depth, -CHECKMATE, CHECKMATE, 1 if gs.getWhiteToMove() else -1)
+            except SearchTimeout:
+                while len(gs.getMoveLog()) > moveLogLength:    #Unwind the moves the interrupted search was in the middle of
+                    gs.undoMove()
+                gs.getValidMoves()
+                break
+            bestMove = self.__nextMove
+            self.__completedDepth = depth
+            self.__bestScore = score
+            self.__stats.iterations.append({"depth": depth, "score": score, "nodes": self.__counter, "seconds": time.perf_counter() - iterationStart,
+                                            "pv": [move.getChessNotation() for move in self.getPrincipalVariation(gs, bestMove, depth)]})
+            if self.__onIteration is not None:
+                self.__onIteration(self.__stats.iterations[-1])
+            if abs(score) >= CHECKMATE:  #Found a forced mate, searching deeper won't change the move
+                break
+        if bestMove is None:    #Budget ran out during the first depth, use whatever it had found
+            bestMove = self.__nextMove
+        if bestMove is None:    #Not even the first root move finished, play the move it would have searched first
+            entry = self.__transpositionTable.lookup(gs.getZobristKey())
+            bestMove = self.orderMoves(validMoves, 0, entry[3] if entry is not None else 0)[0]
+        return self.finishStats(gs, bestMove)
+
+    #Best line found, starting with the root move and then following the hash moves from the transposition table
+    def getPrincipalVariation(self, gs, bestMove, maxLength):
+        line = []
+        move = bestMove
+        seen = set()
+        while move is not None and len(line) < maxLength:
+            seen.add(gs.getZobristKey())
+            gs.makeMove(move)
+            line.append(move)
+            entry = self.__transpositionTable.lookup(gs.getZobristKey())
+            if entry is None or entry[3] == 0 or gs.getZobristKey() in seen:
+                break
+            move = gs.getMoveFromID(entry[3])
+        for move in line:
+            gs.undoMove()
+        return line
+
+    def finishStats(self, gs, bestMove):    #Fills in the totals for the search that just ended and logs them, returns bestMove
+        stats = self.__stats
+        stats.bestMove = bestMove.getChessNotation() if bestMove is not None else ""
+        stats.score = self.__bestScore
+        stats.depth = self.__completedDepth
+        stats.nodes = self.__counter
+        stats.quiescenceNodes = self.__quiescenceNodes
+        stats.seconds = time.perf_counter() - self.__startTime
+        stats.cutoffs = self.__cutoffs
+        stats.firstMoveCutoffs = self.__firstMoveCutoffs
+        stats.hashProbes = self.__hashProbes
+        stats.hashHits = self.__hashHits
+        stats.principalVariation = stats.iterations[-1]["pv"] if stats.iterations else []
+        if self.__statsLog is not None:
+            with open(self.__statsLog, "a") as file:
+                file.write(json.dumps(stats.toDict()) + "\n")
+        return bestMove
+
+    def findMoveNegaMaxAlphaBeta(self, gs, validMoves, depth, alpha, beta, turnMultiplier):
+        self.__counter += 1
+        if self.__counter & 63 == 0 and self.outOfBudget():
+            raise SearchTimeout()
+        #A position seen once before is scored as a draw, if repeating it was good the side to move can repeat it again
+        if depth != self.__rootDepth:
+            if gs.getRepetitions() > 0:
+                return DRAW
+            #Fifty moves is a draw unless the last move mated, and that can only be when in check
+            if gs.getHalfmoveClock() >= 100 and (not gs.inCheck() or len(validMoves if validMoves is not None else gs.getValidMoves()) > 0):
+                return DRAW
+        alphaOriginal = alpha
+        key = gs.getZobristKey()
+        entry = self.__transpositionTable.lookup(key)
+        hashMoveID = 0
+        self.__hashProbes += 1
+        if entry is not None:
+            self.__hashHits += 1
+            entryDepth, entryScore, entryBound, hashMoveID = entry
+            if entryDepth >= depth and depth != self.__rootDepth:  #Root always searches so nextMove gets set
+                if entryBound == EXACT:
+                    return entryScore
+                elif entryBound == LOWER_BOUND:
+                    alpha = max(alpha, entryScore)
+                else:
+                    beta = min(beta, entryScore)
+                if alpha >= beta:
+                    return entryScore
+
+        if depth == 0:
+            return self.quiescenceSearch(gs, alpha, beta, turnMultiplier)
+        if len(validMoves) == 0:    #scoreBoard handles checkmate and stalemate
+            return turnMultiplier * scoreBoard(gs)
+
+        ply = self.__rootDepth - depth
+        validMoves = self.orderMoves(validMoves, ply, hashMoveID)
+
+        maxScore = -CHECKMATE
+        bestMove = None
+        for i, move in enumerate(validMoves):
+            gs.makeMove(move)
+            nextMoves = gs.getValidMoves() if depth > 1 else None   #Quiescence generates its own moves
+            score = -self.findMoveNegaMaxAlphaBeta(gs, nextMoves, depth-1, -beta, -alpha, -turnMultiplier)
+            if score > maxScore:
+                maxScore = score
+                bestMove = move
+                if depth == self.__rootDepth:
+                    self.__nextMove = move
+            gs.undoMove()
+            if maxScore > alpha:
+                alpha = maxScore
+            if alpha >= beta:
+                self.__cutoffs += 1
+                if i == 0:
+                    self.__firstMoveCutoffs += 1
+                if move.getPieceCaptured() == "--":
+                    self.updateMoveOrdering(move, depth, ply)
+                break
+
+        if maxScore <= alphaOriginal:
+            bound = UPPER_BOUND
+        elif maxScore >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.__transpositionTable.store(key, depth, maxScore, bound, bestMove.getMoveID() if bestMove is not None else 0)
+        return maxScore
+
+    #Searches captures until the position is quiet, so the leaves aren't scored in the middle of an exchange
+    def quiescenceSearch(self, gs, alpha, beta, turnMultiplier):
+        self.__counter += 1
+        self.__quiescenceNodes += 1
+        if self.__counter & 63 == 0 and self.outOfBudget():
+            raise SearchTimeout()
+
+        inCheck = gs.inCheck()
+        if inCheck:     #Can't stand pat in check, every evasion is searched
+            validMoves = gs.getValidMoves()
+            if len(validMoves) == 0:
+                return turnMultiplier * scoreBoard(gs)
+            standPat = -CHECKMATE
+        else:
+            standPat = turnMultiplier * scoreBoard(gs)
+            if standPat >= beta:
+                return standPat
+            if standPat + pieceScores["Q"] + DELTA_MARGIN < alpha:   #Even winning a queen wouldn't help
+                return standPat
+            if standPat > alpha:
+                alpha = standPat
+            validMoves = gs.getCaptureMoves()
+
+        maxScore = standPat
+        for move in self.orderMoves(validMoves, 0, 0):
+            captured = move.getPieceCaptured()
+            if not inCheck and standPat + pieceScores[captured[1]] + DELTA_MARGIN < alpha:   #Delta pruning
+                continue
+            gs.makeMove(move)
+            score = -self.quiescenceSearch(gs, -beta, -alpha, -turnMultiplier)
+            gs.undoMove()
+            if score > maxScore:
+                maxScore = score
+                if score > alpha:
+                    alpha = score
+                if alpha >= beta:
+                    break
+        return maxScore
+
+#Searcher used by findBestMove and iterativeDeepening, so its tables stay warm for as long as the process lives.
+#Made on first use, most processes that import ChessAI (through ChessEngine) search with their own Searcher or not at all
+defaultSearcher = None
+
+def getDefaultSearcher():
+    global defaultSearcher
+    if defaultSearcher is None:
+        defaultSearcher = Searcher(TranspositionTable(), SEARCH_LOG)
+    return defaultSearcher
+
+#timeLimit is in seconds, either limit can be None
+def findBestMove(gs, validMoves, returnQueue, timeLimit = None, nodeLimit = None):
+    maxDepth = DEPTH if timeLimit is None and nodeLimit is None else MAX_DEPTH
+    bestMove = iterativeDeepening(gs, validMoves, maxDepth, timeLimit, nodeLimit)
+    print(getDefaultSearcher().getStats(), "| eval cache hits %.2f" % evalCache.getHitRate())
+    returnQueue.put(bestMove)
+
+def iterativeDeepening(gs, validMoves, maxDepth, timeLimit = None, nodeLimit = None, stop = None, startDepth = 1):
+    return getDefaultSearcher().iterativeDeepening(gs, validMoves, maxDepth, timeLimit, nodeLimit, stop, startDepth)
 
 def findMoveMinMax(gs, validMoves, depth, whiteToMove):
     global nextMove
@@ -90,123 +573,167 @@ def findMoveMinMax(gs, validMoves, depth, whiteToMove):
             gs.undoMove()
         return minScore
 
-def findMoveNegaMaxAlphaBeta(gs, validMoves, depth, alpha, beta, turnMultiplier):
-    global nextMove, counter
-    counter += 1
-    if depth == 0:
-        return turnMultiplier * scoreBoard(gs)
-
-    maxScore = -CHECKMATE
-    for move in validMoves:
-        gs.makeMove(move)
-        nextMoves = gs.getValidMoves()
-        score = -findMoveNegaMaxAlphaBeta(gs, nextMoves, depth-1, -beta, -alpha, -turnMultiplier)
-        if score > maxScore:
-            maxScore = score
-            if depth == DEPTH:
-                nextMove = move
-        gs.undoMove()
-        if maxScore > alpha:
-            alpha = maxScore
-        if alpha >= beta:
-            break
-    return maxScore
-
-def evaluateLocation(row, col, piece):
-    whitePawnEval = [
-        [0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0],
-        [5.0,  5.0,  5.0,  5.0,  5.0,  5.0,  5.0,  5.0],
-        [1.0,  1.0,  2.0,  3.0,  3.0,  2.0,  1.0,  1.0],
-        [0.5,  0.5,  1.0,  2.5,  2.5,  1.0,  0.5,  0.5],
-        [0.0,  0.0,  0.0,  2.0,  2.0,  0.0,  0.0,  0.0],
-        [0.5, -0.5, -1.0,  0.0,  0.0, -1.0, -0.5,  0.5],
-        [0.5,  1.0, 1.0,  -2.0, -2.0,  1.0,  1.0,  0.5],
-        [0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0]
-    ]
-
-    blackPawnEval = list(reversed(whitePawnEval))
-
-    knightEval = [
-        [-5.0, -4.0, -3.0, -3.0, -3.0, -3.0, -4.0, -5.0],
-        [-4.0, -2.0,  0.0,  0.0,  0.0,  0.0, -2.0, -4.0],
-        [-3.0,  0.0,  1.0,  1.5,  1.5,  1.0,  0.0, -3.0],
-        [-3.0,  0.5,  1.5,  2.0,  2.0,  1.5,  0.5, -3.0],
-        [-3.0,  0.0,  1.5,  2.0,  2.0,  1.5,  0.0, -3.0],
-        [-3.0,  0.5,  1.0,  1.5,  1.5,  1.0,  0.5, -3.0],
-        [-4.0, -2.0,  0.0,  0.5,  0.5,  0.0, -2.0, -4.0],
-        [-5.0, -4.0, -3.0, -3.0, -3.0, -3.0, -4.0, -5.0]
-    ]
-
-    whiteBishopEval = [
-        [ -2.0, -1.0, -1.0, -1.0, -1.0, -1.0, -1.0, -2.0],
-        [ -1.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0, -1.0],
-        [ -1.0,  0.0,  0.5,  1.0,  1.0,  0.5,  0.0, -1.0],
-        [ -1.0,  0.5,  0.5,  1.0,  1.0,  0.5,  0.5, -1.0],
-        [ -1.0,  0.0,  1.0,  1.0,  1.0,  1.0,  0.0, -1.0],
-        [ -1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0, -1.0],
-        [ -1.0,  0.5,  0.0,  0.0,  0.0,  0.0,  0.5, -1.0],
-        [ -2.0, -1.0, -1.0, -1.0, -1.0, -1.0, -1.0, -2.0]
-    ]
-
-    blackBishopEval = list(reversed(whiteBishopEval))
-
-    whiteRookEval = [
-        [  0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0],
-        [  0.5,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  0.5],
-        [ -0.5,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0, -0.5],
-        [ -0.5,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0, -0.5],
-        [ -0.5,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0, -0.5],
-        [ -0.5,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0, -0.5],
-        [ -0.5,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0, -0.5],
-        [  0.0,   0.0, 0.0,  0.5,  0.5,  0.0,  0.0,  0.0]
-    ]
-
-    blackRookEval = list(reversed(whiteRookEval))
-
-    queenEval = [
-        [ -2.0, -1.0, -1.0, -0.5, -0.5, -1.0, -1.0, -2.0],
-        [ -1.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0, -1.0],
-        [ -1.0,  0.0,  0.5,  0.5,  0.5,  0.5,  0.0, -1.0],
-        [ -0.5,  0.0,  0.5,  0.5,  0.5,  0.5,  0.0, -0.5],
-        [  0.0,  0.0,  0.5,  0.5,  0.5,  0.5,  0.0, -0.5],
-        [ -1.0,  0.5,  0.5,  0.5,  0.5,  0.5,  0.0, -1.0],
-        [ -1.0,  0.0,  0.5,  0.0,  0.0,  0.0,  0.0, -1.0],
-        [ -2.0, -1.0, -1.0, -0.5, -0.5, -1.0, -1.0, -2.0]
-    ]
-
-    whiteKingEval = [
-        [ -3.0, -4.0, -4.0, -5.0, -5.0, -4.0, -4.0, -3.0],
-        [ -3.0, -4.0, -4.0, -5.0, -5.0, -4.0, -4.0, -3.0],
-        [ -3.0, -4.0, -4.0, -5.0, -5.0, -4.0, -4.0, -3.0],
-        [ -3.0, -4.0, -4.0, -5.0, -5.0, -4.0, -4.0, -3.0],
-        [ -2.0, -3.0, -3.0, -4.0, -4.0, -3.0, -3.0, -2.0],
-        [ -1.0, -2.0, -2.0, -2.0, -2.0, -2.0, -2.0, -1.0],
-        [  2.0,  2.0,  0.0,  0.0,  0.0,  0.0,  2.0,  2.0 ],
-        [  2.0,  3.0,  1.0,  0.0,  0.0,  1.0,  3.0,  2.0 ]
-    ]
-
-    blackKingEval = list(reversed(whiteKingEval))
-
-    if piece == "wP":
-        return whitePawnEval[row][col]
-    elif piece == "bP":
-        return blackPawnEval[row][col]
-    elif piece[1] == "N":
-        return knightEval[row][col]
-    elif piece == "wB":
-        return whiteBishopEval[row][col]
-    elif piece == "bB":
-        return blackBishopEval[row][col]
-    elif piece == "wR":
-        return whiteRookEval[row][col]
-    elif piece == "bR":
-        return blackRookEval[row][col]
-    elif piece[1] == "Q":
-        return queenEval[row][col]
-    elif piece == "wK":
-        return whiteKingEval[row][col]
-    elif piece == "bK":
-        return blackKingEval[row][col]
+#Location tables, from white's side of the board except where a black version is made by flipping the rows
+whitePawnEval = [
+    [0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0],
+    [5.0,  5.0,  5.0,  5.0,  5.0,  5.0,  5.0,  5.0],
+    [1.0,  1.0,  2.0,  3.0,  3.0,  2.0,  1.0,  1.0],
+    [0.5,  0.5,  1.0,  2.5,  2.5,  1.0,  0.5,  0.5],
+    [0.0,  0.0,  0.0,  2.0,  2.0,  0.0,  0.0,  0.0],
+    [0.5, -0.5, -1.0,  0.0,  0.0, -1.0, -0.5,  0.5],
+    [0.5,  1.0, 1.0,  -2.0, -2.0,  1.0,  1.0,  0.5],
+    [0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0]
+]
+
+blackPawnEval = list(reversed(whitePawnEval))
+
+knightEval = [
+    [-5.0, -4.0, -3.0, -3.0, -3.0, -3.0, -4.0, -5.0],
+    [-4.0, -2.0,  0.0,  0.0,  0.0,  0.0, -2.0, -4.0],
+    [-3.0,  0.0,  1.0,  1.5,  1.5,  1.0,  0.0, -3.0],
+    [-3.0,  0.5,  1.5,  2.0,  2.0,  1.5,  0.5, -3.0],
+    [-3.0,  0.0,  1.5,  2.0,  2.0,  1.5,  0.0, -3.0],
+    [-3.0,  0.5,  1.0,  1.5,  1.5,  1.0,  0.5, -3.0],
+    [-4.0, -2.0,  0.0,  0.5,  0.5,  0.0, -2.0, -4.0],
+    [-5.0, -4.0, -3.0, -3.0, -3.0, -3.0, -4.0, -5.0]
+]
+
+whiteBishopEval = [
+    [ -2.0, -1.0, -1.0, -1.0, -1.0, -1.0, -1.0, -2.0],
+    [ -1.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0, -1.0],
+    [ -1.0,  0.0,  0.5,  1.0,  1.0,  0.5,  0.0, -1.0],
+    [ -1.0,  0.5,  0.5,  1.0,  1.0,  0.5,  0.5, -1.0],
+    [ -1.0,  0.0,  1.0,  1.0,  1.0,  1.0,  0.0, -1.0],
+    [ -1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0, -1.0],
+    [ -1.0,  0.5,  0.0,  0.0,  0.0,  0.0,  0.5, -1.0],
+    [ -2.0, -1.0, -1.0, -1.0, -1.0, -1.0, -1.0, -2.0]
+]
+
+blackBishopEval = list(reversed(whiteBishopEval))
+
+whiteRookEval = [
+    [  0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0],
+    [  0.5,  1.0,  1.0,  1.0,  1.0,  1.0,  1.0,  0.5],
+    [ -0.5,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0, -0.5],
+    [ -0.5,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0, -0.5],
+    [ -0.5,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0, -0.5],
+    [ -0.5,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0, -0.5],
+    [ -0.5,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0, -0.5],
+    [  0.0,   0.0, 0.0,  0.5,  0.5,  0.0,  0.0,  0.0]
+]
+
+blackRookEval = list(reversed(whiteRookEval))
+
+queenEval = [
+    [ -2.0, -1.0, -1.0, -0.5, -0.5, -1.0, -1.0, -2.0],
+    [ -1.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0, -1.0],
+    [ -1.0,  0.0,  0.5,  0.5,  0.5,  0.5,  0.0, -1.0],
+    [ -0.5,  0.0,  0.5,  0.5,  0.5,  0.5,  0.0, -0.5],
+    [  0.0,  0.0,  0.5,  0.5,  0.5,  0.5,  0.0, -0.5],
+    [ -1.0,  0.5,  0.5,  0.5,  0.5,  0.5,  0.0, -1.0],
+    [ -1.0,  0.0,  0.5,  0.0,  0.0,  0.0,  0.0, -1.0],
+    [ -2.0, -1.0, -1.0, -0.5, -0.5, -1.0, -1.0, -2.0]
+]
+
+whiteKingEval = [
+    [ -3.0, -4.0, -4.0, -5.0, -5.0, -4.0, -4.0, -3.0],
+    [ -3.0, -4.0, -4.0, -5.0, -5.0, -4.0, -4.0, -3.0],
+    [ -3.0, -4.0, -4.0, -5.0, -5.0, -4.0, -4.0, -3.0],
+    [ -3.0, -4.0, -4.0, -5.0, -5.0, -4.0, -4.0, -3.0],
+    [ -2.0, -3.0, -3.0, -4.0, -4.0, -3.0, -3.0, -2.0],
+    [ -1.0, -2.0, -2.0, -2.0, -2.0, -2.0, -2.0, -1.0],
+    [  2.0,  2.0,  0.0,  0.0,  0.0,  0.0,  2.0,  2.0 ],
+    [  2.0,  3.0,  1.0,  0.0,  0.0,  1.0,  3.0,  2.0 ]
+]
+
+blackKingEval = list(reversed(whiteKingEval))
+
+#Endgame versions, the king should come to the middle once the queens and rooks are gone and passed pawns get
+#worth more the closer they are to promoting. The other pieces use the same tables in both phases
+whitePawnEndgameEval = [
+    [0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0],
+    [8.0,  8.0,  8.0,  8.0,  8.0,  8.0,  8.0,  8.0],
+    [5.0,  5.0,  5.0,  5.0,  5.0,  5.0,  5.0,  5.0],
+    [3.0,  3.0,  3.0,  3.0,  3.0,  3.0,  3.0,  3.0],
+    [1.5,  1.5,  1.5,  1.5,  1.5,  1.5,  1.5,  1.5],
+    [0.5,  0.5,  0.5,  0.5,  0.5,  0.5,  0.5,  0.5],
+    [0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0],
+    [0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0,  0.0]
+]
+
+blackPawnEndgameEval = list(reversed(whitePawnEndgameEval))
+
+whiteKingEndgameEval = [
+    [ -5.0, -4.0, -3.0, -2.0, -2.0, -3.0, -4.0, -5.0],
+    [ -3.0, -2.0, -1.0,  0.0,  0.0, -1.0, -2.0, -3.0],
+    [ -3.0, -1.0,  2.0,  3.0,  3.0,  2.0, -1.0, -3.0],
+    [ -3.0, -1.0,  3.0,  4.0,  4.0,  3.0, -1.0, -3.0],
+    [ -3.0, -1.0,  3.0,  4.0,  4.0,  3.0, -1.0, -3.0],
+    [ -3.0, -1.0,  2.0,  3.0,  3.0,  2.0, -1.0, -3.0],
+    [ -3.0, -3.0,  0.0,  0.0,  0.0,  0.0, -3.0, -3.0],
+    [ -5.0, -3.0, -3.0, -3.0, -3.0, -3.0, -3.0, -5.0]
+]
+blackKingEndgameEval = list(reversed(whiteKingEndgameEval))
+
+locationTables = {"wP": whitePawnEval, "bP": blackPawnEval, "wN": knightEval, "bN": knightEval,
+                  "wB": whiteBishopEval, "bB": blackBishopEval, "wR": whiteRookEval, "bR": blackRookEval,
+                  "wQ": queenEval, "bQ": queenEval, "wK": whiteKingEval, "bK": blackKingEval}
+endgameLocationTables = dict(locationTables, wP=whitePawnEndgameEval, bP=blackPawnEndgameEval, wK=whiteKingEndgameEval, bK=blackKingEndgameEval)
+
+def evaluateLocation(row, col, piece, tables = locationTables):
+    return tables[piece][row][col]
+
+#Game phase, each piece counts towards it by its weight (indexed by piece code) so a full board is GAME_PHASE_TOTAL.
+#The GameState blends the middlegame and endgame scores by phase / GAME_PHASE_TOTAL
+GAME_PHASE_TOTAL = 24
+phaseWeights = [0, 1, 1, 2, 4, 0] * 2
+
+#Evaluation tables used by the GameState: the material plus location score of every piece on every square,
+#positive for white and negative for black, at index pieceCode * 64 + square (codes and squares as in ChessBitboard).
+#Built once here, and can be replaced with tuned values through setPieceSquareScores or loadPieceSquareScores
+def buildPieceSquareScores(tables = locationTables):
+    scores = [0.0] * (12 * 64)
+    for piece in range(12):
+        name = PIECE_NAMES[piece]
+        sign = 1 if name[0] == "w" else -1
+        for sq in range(64):
+            row, col = SQUARES[sq]
+            scores[piece * 64 + sq] = sign * (pieceScores[name[1]] + evaluateLocation(row, col, name, tables))
+    return scores
+
+pieceSquareScores = buildPieceSquareScores()
+endgamePieceSquareScores = buildPieceSquareScores(endgameLocationTables)
+
+#Changes the tables in place so every module holding them sees the new values. Games already set up keep the rating
+#they had, load their position again (GameState.loadFen) to rescore them. The endgame table is left alone if not given
+def setPieceSquareScores(scores, endgameScores = None):
+    for table, newScores in ((pieceSquareScores, scores), (endgamePieceSquareScores, endgameScores)):
+        if newScores is None:
+            continue
+        if len(newScores) != 12 * 64:
+            raise ValueError("piece square table needs 768 values, got " + str(len(newScores)))
+        table[:] = [float(score) for score in newScores]
+    evalCache.clear()   #Cached scores came from the old tables
+
+#Tables are saved as JSON, {"middlegame": {"wP": [64 scores, square 0 (a8) first], "wN": [...], ...}, "endgame": {...}}
+#with black scores negative
+def savePieceSquareScores(path):
+    tables = {}
+    for phase, scores in (("middlegame", pieceSquareScores), ("endgame", endgamePieceSquareScores)):
+        tables[phase] = {PIECE_NAMES[piece]: scores[piece * 64: piece * 64 + 64] for piece in range(12)}
+    with open(path, "w") as file:
+        json.dump(tables, file)
+
+def loadPieceSquareScores(path):
+    with open(path) as file:
+        tables = json.load(file)
+    flatTables = []
+    for phase in ("middlegame", "endgame"):
+        scores = []
+        for piece in range(12):
+            scores += tables[phase][PIECE_NAMES[piece]]
+        flatTables.append(scores)
+    setPieceSquareScores(*flatTables)
 
 def scoreBoard(gs):
     if gs.getCheckMate():
@@ -217,17 +744,11 @@ def scoreBoard(gs):
     elif gs.getStaleMate():
         return STALEMATE
 
-
-    score = 0
-    for row in range(8):
-        for col in range(8):
-            piece = gs.getBoard()[row][col]
-            if piece[0] == "w":
-                score += pieceScores[piece[1]]
-                score += evaluateLocation(row, col, gs.getBoard()[row][col])
-            elif piece[0] =="b":
-                score -= pieceScores[piece[1]]
-                score -= evaluateLocation(row, col, gs.getBoard()[row][col])
+    key = gs.getZobristKey()
+    score = evalCache.lookup(key)
+    if score is None:
+        score = gs.getBoardRating()     #Updated piece by piece in makeMove/undoMove, so no need to rescan the board
+        evalCache.store(key, score)
     return score
 
 
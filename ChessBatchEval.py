@@ -0,0 +1,66 @@
+## Name - ChessBatchEval.py
+## Purpose - Scores many positions at once with NumPy, for labeling datasets and tuning the evaluation offline
+## Author - Ryan Brosius
+## Date - 10/18/2026
+
+import numpy as np
+import ChessAI
+from ChessBitboard import EMPTY, PIECE_CODES, FEN_CHARS
+
+#Positions come in one of two shapes:
+#(N, 64) int8 piece codes per square, EMPTY (12) for an empty square, in the same square order as the GameState
+#(N, 12, 64) int8 planes, 1 where the piece code (first index) is on the square
+#Scores are the same as GameState.getBoardRating(), positive is good for white. Checkmate and stalemate aren't detected
+
+#(2, 13, 64) middlegame and endgame score of every piece code on every square from the ChessAI tables,
+#the EMPTY row is all zeros
+def buildWeights():
+    weights = np.zeros((2, EMPTY + 1, 64), dtype=np.float64)
+    weights[0, :EMPTY] = np.asarray(ChessAI.pieceSquareScores, dtype=np.float64).reshape(EMPTY, 64)
+    weights[1, :EMPTY] = np.asarray(ChessAI.endgamePieceSquareScores, dtype=np.float64).reshape(EMPTY, 64)
+    return weights
+
+SQUARE_INDEXES = np.arange(64)
+PHASE_WEIGHTS = np.array(ChessAI.phaseWeights + [0], dtype=np.int64)  #Indexed by piece code, EMPTY counts 0
+
+def evaluateBatch(positions, weights = None):   #Returns a float64 array with one score per position
+    if weights is None:
+        weights = buildWeights()    #Built each call, so tables swapped in with ChessAI.setPieceSquareScores are used
+    positions = np.asarray(positions)
+    if positions.ndim == 2 and positions.shape[1] == 64:
+        codes = positions.astype(np.intp)
+        middlegame = weights[0][codes, SQUARE_INDEXES].sum(axis=1)
+        endgame = weights[1][codes, SQUARE_INDEXES].sum(axis=1)
+        phase = PHASE_WEIGHTS[codes].sum(axis=1)
+    elif positions.ndim == 3 and positions.shape[1:] == (EMPTY, 64):
+        middlegame = np.tensordot(positions, weights[0, :EMPTY], axes=([1, 2], [0, 1]))
+        endgame = np.tensordot(positions, weights[1, :EMPTY], axes=([1, 2], [0, 1]))
+        phase = positions.sum(axis=2, dtype=np.int64) @ PHASE_WEIGHTS[:EMPTY]
+    else:
+        raise ValueError("positions must have shape (N, 64) or (N, 12, 64), got " + str(positions.shape))
+    phase = np.minimum(phase, ChessAI.GAME_PHASE_TOTAL)
+    return (middlegame * phase + endgame * (ChessAI.GAME_PHASE_TOTAL - phase)) / ChessAI.GAME_PHASE_TOTAL
+
+def encodeGameStates(gameStates):   #(N, 64) piece codes for a list of GameStates
+    codes = np.full((len(gameStates), 64), EMPTY, dtype=np.int8)
+    for i, gs in enumerate(gameStates):
+        codes[i] = [PIECE_CODES[name] for row in gs.getBoard() for name in row]
+    return codes
+
+def encodeFens(fens):   #(N, 64) piece codes straight from the board field of each FEN, no GameState is built
+    codes = np.full((len(fens), 64), EMPTY, dtype=np.int8)
+    for i, fen in enumerate(fens):
+        sq = 0
+        for char in fen.split(None, 1)[0]:
+            if char == "/":
+                continue
+            if char.isdigit():
+                sq += int(char)
+            else:
+                codes[i, sq] = FEN_CHARS.index(char)
+                sq += 1
+    return codes
+
+def toPlanes(codes):    #(N, 64) piece codes to (N, 12, 64) planes
+    codes = np.asarray(codes)
+    return (codes[:, None, :] == np.arange(EMPTY, dtype=codes.dtype)[None, :, None]).astype(np.int8)
@@ -0,0 +1,143 @@
+## Name - ChessBitboard.py
+## Purpose - Bitboard constants, piece codes, precomputed attack tables and Zobrist keys used by the ChessEngine
+## Author - Ryan Brosius
+## Date - 10/18/2026
+
+import random
+
+#Squares are numbered row * 8 + col, so square 0 is a8 and square 63 is h1 (same orientation as the old 8x8 list)
+#A bitboard is a python int where bit n is set if square n is occupied
+
+#Piece codes, used as indexes into GameState's bitboard list
+WP, WN, WB, WR, WQ, WK, BP, BN, BB, BR, BQ, BK = range(12)
+EMPTY = 12
+WHITE = 0
+BLACK = 1
+
+#Castle rights are kept as 4 bits, the same bits pick the Zobrist castle key
+WHITE_KING_SIDE = 1
+WHITE_QUEEN_SIDE = 2
+BLACK_KING_SIDE = 4
+BLACK_QUEEN_SIDE = 8
+ALL_CASTLE_RIGHTS = 15
+
+#Castle rights still left after a piece moves from or to the square, a king or rook leaving its
+#starting square (or a rook being captured on it) takes away the rights it was needed for
+CASTLE_MASKS = [ALL_CASTLE_RIGHTS] * 64
+CASTLE_MASKS[0] = ALL_CASTLE_RIGHTS ^ BLACK_QUEEN_SIDE                       #a8
+CASTLE_MASKS[4] = ALL_CASTLE_RIGHTS ^ (BLACK_KING_SIDE | BLACK_QUEEN_SIDE)   #e8
+CASTLE_MASKS[7] = ALL_CASTLE_RIGHTS ^ BLACK_KING_SIDE                        #h8
+CASTLE_MASKS[56] = ALL_CASTLE_RIGHTS ^ WHITE_QUEEN_SIDE                      #a1
+CASTLE_MASKS[60] = ALL_CASTLE_RIGHTS ^ (WHITE_KING_SIDE | WHITE_QUEEN_SIDE)  #e1
+CASTLE_MASKS[63] = ALL_CASTLE_RIGHTS ^ WHITE_KING_SIDE                       #h1
+
+PIECE_NAMES = ["wP", "wN", "wB", "wR", "wQ", "wK", "bP", "bN", "bB", "bR", "bQ", "bK", "--"]
+PIECE_CODES = {name: code for code, name in enumerate(PIECE_NAMES)}
+FEN_CHARS = "PNBRQKpnbrqk"  #Letter used for each piece code in FEN strings
+
+#(row, col) tuple for every square, shared so square lookups never allocate
+SQUARES = tuple((sq // 8, sq % 8) for sq in range(64))
+
+def squareIndex(row, col):
+    return row * 8 + col
+
+def popLsb(bb):    #Returns the lowest set square and the bitboard without it
+    lsb = bb & -bb
+    return lsb.bit_length() - 1, bb ^ lsb
+
+def __stepAttacks(offsets):
+    table = []
+    for sq in range(64):
+        row, col = SQUARES[sq]
+        attacks = 0
+        for dRow, dCol in offsets:
+            endRow = row + dRow
+            endCol = col + dCol
+            if 0 <= endRow < 8 and 0 <= endCol < 8:
+                attacks |= 1 << squareIndex(endRow, endCol)
+        table.append(attacks)
+    return table
+
+KNIGHT_ATTACKS = __stepAttacks(((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)))
+KING_ATTACKS = __stepAttacks(((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)))
+#Squares attacked BY a pawn of the given color standing on the square (white pawns move up the board, towards row 0)
+PAWN_ATTACKS = [__stepAttacks(((-1, -1), (-1, 1))), __stepAttacks(((1, -1), (1, 1)))]
+
+def __rays(dRow, dCol):
+    table = []
+    for sq in range(64):
+        row, col = SQUARES[sq]
+        ray = 0
+        for i in range(1, 8):
+            endRow = row + dRow * i
+            endCol = col + dCol * i
+            if not (0 <= endRow < 8 and 0 <= endCol < 8):
+                break
+            ray |= 1 << squareIndex(endRow, endCol)
+        table.append(ray)
+    return table
+
+#Rays are stored with a flag saying if the ray runs towards higher square numbers,
+#which decides if the first blocker is the lowest or the highest set bit
+NORTH = __rays(-1, 0)
+SOUTH = __rays(1, 0)
+WEST = __rays(0, -1)
+EAST = __rays(0, 1)
+NORTH_WEST = __rays(-1, -1)
+NORTH_EAST = __rays(-1, 1)
+SOUTH_WEST = __rays(1, -1)
+SOUTH_EAST = __rays(1, 1)
+ROOK_RAYS = ((NORTH, False), (SOUTH, True), (WEST, False), (EAST, True))
+BISHOP_RAYS = ((NORTH_WEST, False), (NORTH_EAST, False), (SOUTH_WEST, True), (SOUTH_EAST, True))
+
+def slidingAttacks(sq, occupied, rays):
+    attacks = 0
+    for table, positive in rays:
+        ray = table[sq]
+        blockers = ray & occupied
+        if blockers:
+            if positive:
+                ray ^= table[(blockers & -blockers).bit_length() - 1]
+            else:
+                ray ^= table[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+def rookAttacks(sq, occupied):
+    return slidingAttacks(sq, occupied, ROOK_RAYS)
+
+def bishopAttacks(sq, occupied):
+    return slidingAttacks(sq, occupied, BISHOP_RAYS)
+
+def queenAttacks(sq, occupied):
+    return slidingAttacks(sq, occupied, ROOK_RAYS) | slidingAttacks(sq, occupied, BISHOP_RAYS)
+
+FULL = (1 << 64) - 1
+FILE_A = sum(1 << squareIndex(row, 0) for row in range(8))
+FILE_H = sum(1 << squareIndex(row, 7) for row in range(8))
+RANK_8 = 0xFF           #Row 0
+RANK_1 = 0xFF << 56     #Row 7
+
+def __lineTables():    #Squares strictly between two aligned squares, and the whole line through them
+    between = [[0] * 64 for _ in range(64)]
+    line = [[0] * 64 for _ in range(64)]
+    opposites = ((NORTH, SOUTH), (WEST, EAST), (NORTH_WEST, SOUTH_EAST), (NORTH_EAST, SOUTH_WEST))
+    for forward, backward in opposites:
+        for table in (forward, backward):
+            for sq in range(64):
+                fullLine = forward[sq] | backward[sq] | (1 << sq)
+                targets = table[sq]
+                while targets:
+                    target, targets = popLsb(targets)
+                    between[sq][target] = table[sq] ^ table[target] ^ (1 << target)
+                    line[sq][target] = fullLine
+    return between, line
+
+BETWEEN, LINE = __lineTables()
+
+#Zobrist keys, seeded so every process (and every run) hashes the same position to the same key
+__zobristRandom = random.Random(20220621)
+ZOBRIST_PIECES = [[__zobristRandom.getrandbits(64) for sq in range(64)] for piece in range(12)]
+ZOBRIST_BLACK_TO_MOVE = __zobristRandom.getrandbits(64)
+ZOBRIST_CASTLE = [__zobristRandom.getrandbits(64) for rights in range(16)]  #Indexed by the 4 castle right bits
+ZOBRIST_ENPASSANT = [__zobristRandom.getrandbits(64) for col in range(8)]   #Indexed by the file of the enpassant square
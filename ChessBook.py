@@ -0,0 +1,156 @@
+## Name - ChessBook.py
+## Purpose - Opening book read straight from a memory mapped file, gives book moves in the opening without searching
+## Author - Ryan Brosius
+## Date - 10/18/2026
+
+import argparse
+import mmap
+import os
+import random
+import struct
+from ChessEngine import GameState, STARTING_FEN
+
+#Set CHESS_BOOK to a book file to have the engine worker play from it (see ChessWorker)
+BOOK_PATH = os.environ.get("CHESS_BOOK")
+BOOK_PLIES = 16     #Moves past this ply of a line aren't put in the book
+MAX_WEIGHT = 0xFFFF
+
+#Laid out like a Polyglot book: 16 byte big endian entries (key, move, weight, learn) sorted by key, every move
+#of a position next to each other. The key is GameState.getZobristKey() and the move is Move.getMoveID(), so books
+#are only readable by this engine and not by Polyglot tools (the real Polyglot hashes and move bits are different)
+ENTRY = struct.Struct(">QHHI")
+KEY = struct.Struct(">Q")
+
+#Lines the default book is built from, as moves from the initial position
+OPENING_LINES = [
+    ("e2e4 e7e5 g1f3 b8c6 f1b5 a7a6 b5a4 g8f6 e1g1 f8e7 f1e1 b7b5 a4b3 d7d6", 10),   #Ruy Lopez
+    ("e2e4 e7e5 g1f3 b8c6 f1c4 f8c5 c2c3 g8f6 d2d4 e5d4 c3d4 c5b4", 6),     #Italian
+    ("e2e4 e7e5 g1f3 b8c6 d2d4 e5d4 f3d4 g8f6 d4c6 b7c6", 4),   #Scotch
+    ("e2e4 e7e5 g1f3 g8f6 f3e5 d7d6 e5f3 f6e4 d2d4 d6d5", 4),   #Petrov
+    ("e2e4 c7c5 g1f3 d7d6 d2d4 c5d4 f3d4 g8f6 b1c3 a7a6", 10),  #Sicilian Najdorf
+    ("e2e4 c7c5 g1f3 b8c6 d2d4 c5d4 f3d4 g8f6 b1c3 e7e5", 6),   #Sicilian Sveshnikov
+    ("e2e4 c7c5 b1c3 b8c6 g2g3 g7g6 f1g2 f8g7", 3),     #Closed Sicilian
+    ("e2e4 e7e6 d2d4 d7d5 b1c3 g8f6 c1g5 f8e7 e4e5 f6d7", 6),   #French
+    ("e2e4 c7c6 d2d4 d7d5 b1c3 d5e4 c3e4 c8f5 e4g3 f5g6", 6),   #Caro-Kann
+    ("e2e4 d7d5 e4d5 d8d5 b1c3 d5a5 d2d4 g8f6", 2),     #Scandinavian
+    ("d2d4 d7d5 c2c4 e7e6 b1c3 g8f6 c1g5 f8e7 e2e3 e8g8 g1f3", 10),    #Queen's Gambit Declined
+    ("d2d4 d7d5 c2c4 c7c6 g1f3 g8f6 b1c3 d5c4 a2a4 c8f5", 6),   #Slav
+    ("d2d4 d7d5 c2c4 d5c4 g1f3 g8f6 e2e3 e7e6 f1c4 c7c5", 4),   #Queen's Gambit Accepted
+    ("d2d4 g8f6 c2c4 e7e6 b1c3 f8b4 e2e3 e8g8 f1d3 d7d5", 8),   #Nimzo-Indian
+    ("d2d4 g8f6 c2c4 g7g6 b1c3 f8g7 e2e4 d7d6 g1f3 e8g8 f1e2 e7e5", 8),    #King's Indian
+    ("d2d4 g8f6 c2c4 e7e6 g1f3 b7b6 g2g3 c8b7 f1g2 f8e7", 5),   #Queen's Indian
+    ("d2d4 g8f6 c2c4 g7g6 b1c3 d7d5 c4d5 f6d5 e2e4 d5c3 b2c3 f8g7", 5),    #Grunfeld
+    ("c2c4 e7e5 b1c3 g8f6 g1f3 b8c6 g2g3 d7d5 c4d5 f6d5", 5),   #English
+    ("c2c4 g8f6 b1c3 e7e6 e2e4 d7d5 e4e5 d5d4", 2),
+    ("g1f3 d7d5 g2g3 g8f6 f1g2 e7e6 e1g1 f8e7 d2d3 e8g8", 4),   #Reti
+]
+
+#Read only view of a book file. The file is mapped rather than read, so only the pages a lookup touches are loaded,
+#and every process that opens the same book (the engine worker, pool processes) shares the one copy the OS caches
+class OpeningBook():
+    def __init__(self, path):
+        self.__file = open(path, "rb")
+        size = os.fstat(self.__file.fileno()).st_size
+        self.__entries = size // ENTRY.size
+        self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ) if size > 0 else None  #Empty files can't be mapped
+
+    def getEntryCount(self):
+        return self.__entries
+
+    def __keyAt(self, index):
+        return KEY.unpack_from(self.__map, index * ENTRY.size)[0]
+
+    #[(moveID, weight)] of every book move in the position with this key, found with a binary search
+    def lookup(self, key):
+        low, high = 0, self.__entries
+        while low < high:   #First entry with a key not below key
+            middle = (low + high) // 2
+            if self.__keyAt(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        moves = []
+        for index in range(low, self.__entries):
+            entryKey, moveID, weight, learn = ENTRY.unpack_from(self.__map, index * ENTRY.size)
+            if entryKey != key:
+                break
+            moves.append((moveID, weight))
+        return moves
+
+    #Picks a legal book move at random, weighted by the book weights, or None when the position isn't in the book.
+    #Book moves that aren't legal here (two positions sharing a key) are skipped
+    def getMove(self, gs, validMoves = None):
+        if validMoves is None:
+            validMoves = gs.getValidMoves()
+        movesByID = {move.getMoveID(): move for move in validMoves}
+        choices = [(movesByID[moveID], weight) for moveID, weight in self.lookup(gs.getZobristKey()) if moveID in movesByID and weight > 0]
+        if not choices:
+            return None
+        pick = random.randrange(sum(weight for move, weight in choices))
+        for move, weight in choices:
+            if pick < weight:
+                return move
+            pick -= weight
+
+    def close(self):
+        if self.__map is not None:
+            self.__map.close()
+        self.__file.close()
+
+#Writes (key, moveID, weight) entries as a book, the same key and move given more than once add up their weights
+def writeBook(path, entries):
+    weights = {}
+    for key, moveID, weight in entries:
+        weights[(key, moveID)] = weights.get((key, moveID), 0) + weight
+    with open(path, "wb") as file:
+        for (key, moveID), weight in sorted(weights.items(), key=lambda item: (item[0][0], -item[1])):
+            file.write(ENTRY.pack(key, moveID, min(weight, MAX_WEIGHT), 0))
+    return len(weights)
+
+#Book entries from lines of moves ("e2e4 e7e5 ..." with a weight), every position along a line gets its next move.
+#Stops a line at the first move that isn't legal
+def bookEntries(lines, maxPlies = BOOK_PLIES, fen = STARTING_FEN):
+    entries = []
+    for line, weight in lines:
+        gs = GameState.fromFen(fen)
+        for notation in line.split()[:maxPlies]:
+            move = next((move for move in gs.getValidMoves() if move.getChessNotation() == notation), None)
+            if move is None:
+                break
+            entries.append((gs.getZobristKey(), move.getMoveID(), weight))
+            gs.makeMove(move)
+    return entries
+
+def readLines(path):    #One line of moves per row, optionally ending in its weight, # starts a comment
+    lines = []
+    with open(path) as file:
+        for row in file:
+            tokens = row.split("#", 1)[0].split()
+            if not tokens:
+                continue
+            weight = 1
+            if tokens[-1].isdigit():
+                weight = int(tokens.pop())
+            lines.append((" ".join(tokens), weight))
+    return lines
+
+def buildBook(path, lines = OPENING_LINES, maxPlies = BOOK_PLIES):    #Returns the number of entries written
+    return writeBook(path, bookEntries(lines, maxPlies))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds and probes ChessAI opening books")
+    parser.add_argument("book", help="book file")
+    parser.add_argument("--build", action="store_true", help="write the book, from --lines or the built in lines")
+    parser.add_argument("--lines", help="text file with one line of moves per row, optionally ending in its weight")
+    parser.add_argument("--plies", type=int, default=BOOK_PLIES, help="moves of each line that go in the book")
+    parser.add_argument("--fen", default=STARTING_FEN, help="position to list the book moves of")
+    args = parser.parse_args()
+    if args.build:
+        print("%d entries written to %s" % (buildBook(args.book, readLines(args.lines) if args.lines else OPENING_LINES, args.plies), args.book))
+    else:
+        book = OpeningBook(args.book)
+        gs = GameState.fromFen(args.fen)
+        movesByID = {move.getMoveID(): move for move in gs.getValidMoves()}
+        for moveID, weight in book.lookup(gs.getZobristKey()):
+            print(movesByID[moveID].getChessNotation() if moveID in movesByID else "?", weight)
+        book.close()
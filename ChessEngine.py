@@ -4,10 +4,18 @@
 ## Date - 6/21/2022
 
 import ChessAI
+from ChessBitboard import (WP, WN, WB, WR, WQ, WK, BP, BK, EMPTY, WHITE, BLACK, PIECE_NAMES, PIECE_CODES, FEN_CHARS, SQUARES, FULL, FILE_A, FILE_H, RANK_1, RANK_8,
+                           KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, BETWEEN, LINE, ZOBRIST_PIECES, ZOBRIST_BLACK_TO_MOVE, ZOBRIST_CASTLE,
+                           ZOBRIST_ENPASSANT, WHITE_KING_SIDE, WHITE_QUEEN_SIDE, BLACK_KING_SIDE, BLACK_QUEEN_SIDE, ALL_CASTLE_RIGHTS,
+                           CASTLE_MASKS, squareIndex, rookAttacks, bishopAttacks, queenAttacks)
+
+HISTORY_SIZE = 512  #Plies the undo history holds before it has to grow, enough for a long game plus a search on top
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+CASTLE_CHARS = (("K", WHITE_KING_SIDE), ("Q", WHITE_QUEEN_SIDE), ("k", BLACK_KING_SIDE), ("q", BLACK_QUEEN_SIDE))
 
 class GameState():
-    def __init__(self):
-        #8x8 2D list
+    def __init__(self, fen = None):    #Starts from the initial position unless a FEN string is given
+        #8x8 2D list, only used to set up the bitboards below
         #bR --> Black Rook
         #bN --> Black Knight
         #bB --> Black Bishop
@@ -15,7 +23,7 @@ class GameState():
         #bK --> Black King
         #bP --> Black Pawn
         #-- --> Empty Space
-        self.__board = [
+        startingBoard = [
             ["bR", "bN", "bB", "bQ", "bK", "bB", "bN", "bR"],
             ["bP", "bP", "bP", "bP", "bP", "bP", "bP", "bP"],
             ["--", "--", "--", "--", "--", "--", "--", "--"],
@@ -25,20 +33,102 @@ class GameState():
             ["wP", "wP", "wP", "wP", "wP", "wP", "wP", "wP"],
             ["wR", "wN", "wB", "wQ", "wK", "wB", "wN", "wR"]
         ]
-        self.__whiteToMove = True
+        #Undo history, slot n holds the position after n moves. The lists are made once up front so
+        #makeMove only writes ints into them and undoMove reads the old state back instead of recomputing it
+        self.__stateHistory = [0] * HISTORY_SIZE    #Castle rights | (enpassant square + 1) << 4 | phase << 11 | halfmove clock << 18
+        self.__keyHistory = [0] * HISTORY_SIZE
+        self.__middlegameHistory = [0] * HISTORY_SIZE
+        self.__endgameHistory = [0] * HISTORY_SIZE
+        if fen is None:
+            self.loadPosition(startingBoard)
+        else:
+            self.loadFen(fen)
+
+    @classmethod
+    def fromFen(cls, fen):
+        return cls(fen)
+
+    #Sets up any position from an 8x8 list of piece names (like startingBoard above), the move log starts empty
+    def loadPosition(self, board, whiteToMove = True, castleRights = ALL_CASTLE_RIGHTS, enpassantSquare = -1, halfmoveClock = 0, fullmoveNumber = 1):
+        self.__pieces = [0] * 12    #One bitboard per piece code (see ChessBitboard.py)
+        self.__colorOccupancy = [0, 0]  #All white pieces, all black pieces
+        self.__mailbox = [EMPTY] * 64   #Piece code on each square, so the piece on a square is a single lookup
+        #Material and location scores with the middlegame and endgame tables, and the game phase they are blended by.
+        #All three are kept up to date as pieces are put on and taken off squares
+        self.__middlegameRating = 0
+        self.__endgameRating = 0
+        self.__phase = 0
+        self.__zobristKey = 0   #Hash of the position, also kept up to date as pieces move
+        for row in range(8):
+            for col in range(8):
+                if board[row][col] != "--":
+                    self.__putPiece(squareIndex(row, col), PIECE_CODES[board[row][col]])
+        self.__board = None #8x8 list view for getBoard, rebuilt lazily after the position changes
+        self.__whiteToMove = whiteToMove
         self.__moveLog = []
-        self.__boardRatingLog = []
-        self.__whiteKingLocation = (7, 4)
-        self.__blackKingLocation = (0, 4)
         self.__checkMate = False
         self.__staleMate = False
-        self.__enpassantPossible = () #cords for enpassant square
-        self.__enpassantPossibleLog = [self.__enpassantPossible]
-        self.__currentCastlingRight = castleRights(True, True, True, True)
-        self.__castleRightsLog = [castleRights(self.__currentCastlingRight.wks, self.__currentCastlingRight.bks,
-                                               self.__currentCastlingRight.wqs, self.__currentCastlingRight.bqs)]
+        self.__enpassantSquare = enpassantSquare    #Square a pawn can capture onto enpassant, -1 if there isn't one
+        self.__castleRights = castleRights
+        self.__halfmoveClock = halfmoveClock    #Moves since the last capture or pawn move
+        self.__zobristKey ^= self.__stateKey()
+        self.__startPly = (fullmoveNumber - 1) * 2 + (0 if whiteToMove else 1)   #Plies played before this position
+        self.__ply = 0
+        self.__saveState()
+
+    def loadFen(self, fen):     #Sets the position straight from the FEN fields, no moves are replayed
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError("FEN needs at least the board, side to move, castling and enpassant fields: " + fen)
+        board = []
+        for rank in fields[0].split("/"):
+            row = []
+            for char in rank:
+                if char.isdigit():
+                    row += ["--"] * int(char)
+                else:
+                    row.append(PIECE_NAMES[FEN_CHARS.index(char)])
+            board.append(row)
+        castleRights = 0
+        for char, right in CASTLE_CHARS:
+            if char in fields[2]:
+                castleRights |= right
+        enpassantSquare = -1
+        if fields[3] != "-":
+            enpassantSquare = squareIndex(Move.ranksToRows[fields[3][1]], Move.filesToCols[fields[3][0]])
+        halfmoveClock = int(fields[4]) if len(fields) > 4 else 0
+        fullmoveNumber = int(fields[5]) if len(fields) > 5 else 1
+        self.loadPosition(board, fields[1] == "w", castleRights, enpassantSquare, halfmoveClock, fullmoveNumber)
+
+    def toFen(self):
+        rows = []
+        for row in range(8):
+            text = ""
+            empty = 0
+            for piece in self.__mailbox[row * 8: row * 8 + 8]:
+                if piece == EMPTY:
+                    empty += 1
+                else:
+                    if empty:
+                        text += str(empty)
+                        empty = 0
+                    text += FEN_CHARS[piece]
+            if empty:
+                text += str(empty)
+            rows.append(text)
+        castling = "".join(char for char, right in CASTLE_CHARS if self.__castleRights & right) or "-"
+        if self.__enpassantSquare < 0:
+            enpassant = "-"
+        else:
+            row, col = SQUARES[self.__enpassantSquare]
+            enpassant = Move.colsToFiles[col] + Move.rowsToRanks[row]
+        return " ".join(("/".join(rows), "w" if self.__whiteToMove else "b", castling, enpassant,
+                         str(self.__halfmoveClock), str(self.getFullmoveNumber())))
 
     def getBoard(self):
+        if self.__board is None:
+            names = [PIECE_NAMES[code] for code in self.__mailbox]
+            self.__board = [names[row * 8: row * 8 + 8] for row in range(8)]
         return self.__board
 
     def getMoveLog(self):
@@ -53,303 +143,445 @@ class GameState():
     def getStaleMate(self):
         return self.__staleMate
 
-    def getBoardRatingLog(self):
-        return self.__boardRatingLog
+    def getBoardRatingLog(self):    #Board rating after each move in the move log, builds a new list so read it once per use
+        return [self.getBoardRatingAt(ply) for ply in range(1, self.__ply + 1)]
+
+    def getBoardRatingAt(self, ply):    #Board rating after the ply-th move of the move log (1 is the first move)
+        return self.__blendRating(self.__middlegameHistory[ply], self.__endgameHistory[ply], (self.__stateHistory[ply] >> 11) & 127)
+
+    def getBoardRating(self):
+        return self.__blendRating(self.__middlegameRating, self.__endgameRating, self.__phase)
+
+    def getPhase(self):     #ChessAI.GAME_PHASE_TOTAL with all the pieces on the board, down to 0 with only kings and pawns
+        return self.__phase if self.__phase < ChessAI.GAME_PHASE_TOTAL else ChessAI.GAME_PHASE_TOTAL
+
+    def __blendRating(self, middlegameRating, endgameRating, phase):
+        total = ChessAI.GAME_PHASE_TOTAL
+        if phase > total:   #Promotions can push the phase past the starting total
+            phase = total
+        return (middlegameRating * phase + endgameRating * (total - phase)) / total
+
+    def getZobristKey(self):
+        return self.__zobristKey
+
+    def getHalfmoveClock(self):
+        return self.__halfmoveClock
+
+    #Times the current position came up before, with the same side to move. Only positions since the last capture
+    #or pawn move can repeat, so the key history is only scanned back that far
+    def getRepetitions(self):
+        keyHistory = self.__keyHistory
+        key = self.__zobristKey
+        repetitions = 0
+        for ply in range(self.__ply - 4, max(self.__ply - self.__halfmoveClock, 0) - 1, -2):
+            if keyHistory[ply] == key:
+                repetitions += 1
+        return repetitions
+
+    def isThreefoldRepetition(self):
+        return self.getRepetitions() >= 2
+
+    def isFiftyMoveRule(self):  #Fifty moves each without a capture or pawn move
+        return self.__halfmoveClock >= 100
+
+    def isDraw(self):   #Draw by repetition or the fifty move rule, checkmate and stalemate are found by getValidMoves
+        return self.__halfmoveClock >= 100 or self.getRepetitions() >= 2
+
+    def getFullmoveNumber(self):
+        return (self.__startPly + self.__ply) // 2 + 1
+
+    def __putPiece(self, sq, piece):
+        bit = 1 << sq
+        self.__pieces[piece] |= bit
+        self.__colorOccupancy[piece // 6] |= bit
+        self.__mailbox[sq] = piece
+        self.__middlegameRating += ChessAI.pieceSquareScores[piece * 64 + sq]
+        self.__endgameRating += ChessAI.endgamePieceSquareScores[piece * 64 + sq]
+        self.__phase += ChessAI.phaseWeights[piece]
+        self.__zobristKey ^= ZOBRIST_PIECES[piece][sq]
+
+    def __removePiece(self, sq):    #Clears the square and returns the piece code that was on it
+        piece = self.__mailbox[sq]
+        if piece != EMPTY:
+            bit = 1 << sq
+            self.__pieces[piece] ^= bit
+            self.__colorOccupancy[piece // 6] ^= bit
+            self.__mailbox[sq] = EMPTY
+            self.__middlegameRating -= ChessAI.pieceSquareScores[piece * 64 + sq]
+            self.__endgameRating -= ChessAI.endgamePieceSquareScores[piece * 64 + sq]
+            self.__phase -= ChessAI.phaseWeights[piece]
+            self.__zobristKey ^= ZOBRIST_PIECES[piece][sq]
+        return piece
+
+    def __movePiece(self, startSq, endSq):
+        piece = self.__removePiece(startSq)
+        if piece != EMPTY:
+            self.__putPiece(endSq, piece)
+
+    #Same as __putPiece/__removePiece without the rating and key, undoMove restores those from the history
+    def __placePiece(self, sq, piece):
+        bit = 1 << sq
+        self.__pieces[piece] |= bit
+        self.__colorOccupancy[piece // 6] |= bit
+        self.__mailbox[sq] = piece
+
+    def __liftPiece(self, sq):
+        piece = self.__mailbox[sq]
+        if piece != EMPTY:
+            bit = 1 << sq
+            self.__pieces[piece] ^= bit
+            self.__colorOccupancy[piece // 6] ^= bit
+            self.__mailbox[sq] = EMPTY
+        return piece
+
+    def __stateKey(self):   #Part of the Zobrist key that isn't piece placement
+        key = ZOBRIST_CASTLE[self.__castleRights]
+        if not self.__whiteToMove:
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        if self.__enpassantSquare >= 0:
+            key ^= ZOBRIST_ENPASSANT[self.__enpassantSquare & 7]
+        return key
+
+    def __saveState(self):  #Writes the current position into its history slot
+        ply = self.__ply
+        if ply == len(self.__keyHistory):   #Longer than any game so far, double the history
+            self.__stateHistory.extend([0] * ply)
+            self.__keyHistory.extend([0] * ply)
+            self.__middlegameHistory.extend([0] * ply)
+            self.__endgameHistory.extend([0] * ply)
+        self.__stateHistory[ply] = self.__castleRights | ((self.__enpassantSquare + 1) << 4) | (self.__phase << 11) | (self.__halfmoveClock << 18)
+        self.__keyHistory[ply] = self.__zobristKey
+        self.__middlegameHistory[ply] = self.__middlegameRating
+        self.__endgameHistory[ply] = self.__endgameRating
+
+    def __kingSquare(self, color):
+        return self.__pieces[BK if color == BLACK else WK].bit_length() - 1
 
     def makeMove(self, move):
-        self.__board[move.getStartSq()[0]][move.getStartSq()[1]] = "--"
-        self.__board[move.getEndSq()[0]][move.getEndSq()[1]] = move.getPieceMoved()
+        startSq = move.getStartIndex()
+        endSq = move.getEndIndex()
+        pieceMoved = move.getPieceMovedCode()
+        self.__zobristKey ^= self.__stateKey()
+        self.__removePiece(startSq)
+        self.__removePiece(endSq)
         self.__moveLog.append(move)
         self.__whiteToMove = not self.__whiteToMove
-        if move.getPieceMoved() == "wK":
-            self.__whiteKingLocation = move.getEndSq()
-        elif move.getPieceMoved() == "bK":
-            self.__blackKingLocation = move.getEndSq()
 
         #Pawn promotion
         if move.isPawnPromotion():
-            self.__board[move.getEndSq()[0]][move.getEndSq()[1]] = move.getPieceMoved()[0] + "Q"
+            self.__putPiece(endSq, move.getPromotionPieceCode())
+        else:
+            self.__putPiece(endSq, pieceMoved)
 
         #Enpassant move
         if move.isEnpassantMove():
-            self.__board[move.getStartSq()[0]][move.getEndSq()[1]] = "--"
-        if move.getPieceMoved()[1] == "P" and abs(move.getStartSq()[0] - move.getEndSq()[0]) == 2:
-            self.__enpassantPossible = ((move.getStartSq()[0] + move.getEndSq()[0])//2, move.getStartSq()[1])
+            self.__removePiece((startSq & ~7) | (endSq & 7))  #Captured pawn is on the start row, end column
+        if (pieceMoved == WP or pieceMoved == BP) and abs(startSq - endSq) == 16:
+            self.__enpassantSquare = (startSq + endSq) // 2
+        else:
+            self.__enpassantSquare = -1
+        if pieceMoved == WP or pieceMoved == BP or move.getPieceCapturedCode() != EMPTY:
+            self.__halfmoveClock = 0
         else:
-            self.__enpassantPossible = ()
-        self.__enpassantPossibleLog.append(self.__enpassantPossible)
+            self.__halfmoveClock += 1
 
         #Castle move
         if move.isCastleMove():
-            if move.getEndSq()[1] - move.getStartSq()[1] == 2: #King Side
-                self.__board[move.getEndSq()[0]][move.getEndSq()[1]-1] = self.__board[move.getEndSq()[0]][move.getEndSq()[1]+1]
-                self.__board[move.getEndSq()[0]][move.getEndSq()[1]+1] = "--"
+            if endSq - startSq == 2: #King Side
+                self.__movePiece(endSq + 1, endSq - 1)
             else: #Queen Side
-                self.__board[move.getEndSq()[0]][move.getEndSq()[1]+1] = self.__board[move.getEndSq()[0]][move.getEndSq()[1]-2]
-                self.__board[move.getEndSq()[0]][move.getEndSq()[1]-2] = "--"
-
-
+                self.__movePiece(endSq - 2, endSq + 1)
+        self.__board = None
 
         #Castling
         self.updateCastleRights(move)
-        self.__castleRightsLog.append(castleRights(self.__currentCastlingRight.wks, self.__currentCastlingRight.bks,
-                                               self.__currentCastlingRight.wqs, self.__currentCastlingRight.bqs))
-
-        #Updating Rating Log
-        self.__boardRatingLog.append(ChessAI.scoreBoard(self))
-
+        self.__zobristKey ^= self.__stateKey()
 
+        #Saving the new position for undoMove and the rating log
+        self.__ply += 1
+        self.__saveState()
 
     def undoMove(self):
-        if len(self.getMoveLog()) > 0:
+        if self.__ply > 0:
             move = self.__moveLog.pop()
-            self.__board[move.getStartSq()[0]][move.getStartSq()[1]] = move.getPieceMoved()
-            self.__board[move.getEndSq()[0]][move.getEndSq()[1]] = move.getPieceCaptured()
-            self.__whiteToMove = not self.__whiteToMove
-            if move.getPieceMoved() == "wK":
-                self.__whiteKingLocation = move.getStartSq()
-            elif move.getPieceMoved() == "bK":
-                self.__blackKingLocation = move.getStartSq()
+            startSq = move.getStartIndex()
+            endSq = move.getEndIndex()
+            self.__liftPiece(endSq)
+            self.__placePiece(startSq, move.getPieceMovedCode())
             if move.isEnpassantMove():
-                self.__board[move.getEndSq()[0]][move.getEndSq()[1]] = "--"
-                self.__board[move.getStartSq()[0]][move.getEndSq()[1]] = move.getPieceCaptured()
-            self.__enpassantPossibleLog.pop()
-            self.__enpassantPossible = self.__enpassantPossibleLog[-1]
-            self.__castleRightsLog.pop()
-            newRights = self.__castleRightsLog[-1]
-            self.__currentCastlingRight = castleRights(newRights.wks, newRights.bks, newRights.wqs, newRights.bqs)
+                self.__placePiece((startSq & ~7) | (endSq & 7), move.getPieceCapturedCode())
+            elif move.getPieceCapturedCode() != EMPTY:
+                self.__placePiece(endSq, move.getPieceCapturedCode())
             if move.isCastleMove():
-                if move.getEndSq()[1] - move.getStartSq()[1] == 2:
-                    self.__board[move.getEndSq()[0]][move.getEndSq()[1]+1] = self.__board[move.getEndSq()[0]][move.getEndSq()[1]-1]
-                    self.__board[move.getEndSq()[0]][move.getEndSq()[1]-1] = "--"
-                else:
-                    self.__board[move.getEndSq()[0]][move.getEndSq()[1]-2] = self.__board[move.getEndSq()[0]][move.getEndSq()[1]+1]
-                    self.__board[move.getEndSq()[0]][move.getEndSq()[1]+1] = "--"
+                rook = self.__liftPiece(endSq - 1 if endSq - startSq == 2 else endSq + 1)
+                if rook != EMPTY:
+                    self.__placePiece(endSq + 1 if endSq - startSq == 2 else endSq - 2, rook)
+            self.__whiteToMove = not self.__whiteToMove
+
+            #Everything else comes straight back from the history
+            self.__ply -= 1
+            state = self.__stateHistory[self.__ply]
+            self.__castleRights = state & 15
+            self.__enpassantSquare = ((state >> 4) & 127) - 1
+            self.__phase = (state >> 11) & 127
+            self.__halfmoveClock = state >> 18
+            self.__zobristKey = self.__keyHistory[self.__ply]
+            self.__middlegameRating = self.__middlegameHistory[self.__ply]
+            self.__endgameRating = self.__endgameHistory[self.__ply]
+            self.__board = None
             self.__checkMate = False
             self.__staleMate = False
-            self.__boardRatingLog.pop()
 
 
     def updateCastleRights(self, move):
-        if move.getPieceMoved() == "wK":
-            self.__currentCastlingRight.wks = False
-            self.__currentCastlingRight.wqs = False
-        elif move.getPieceMoved() == "bK":
-            self.__currentCastlingRight.bks = False
-            self.__currentCastlingRight.bqs = False
-        elif move.getPieceMoved() == "wR" and move.getStartSq() == (7,0):
-            self.__currentCastlingRight.wqs = False
-        elif move.getPieceMoved() == "wR" and move.getStartSq() == (7,7):
-            self.__currentCastlingRight.wks = False
-        elif move.getPieceMoved() == "bR" and move.getStartSq() == (0,7):
-            self.__currentCastlingRight.bks = False
-
-        if move.getPieceCaptured() == "wR":
-            if move.getEndSq() == (7,0):
-                self.__currentCastlingRight.wqs = False
-            elif move.getEndSq() == (7,7):
-                self.__currentCastlingRight.wks = False
-        elif move.getPieceCaptured() == "bR":
-            if move.getEndSq() == (0,0):
-                self.__currentCastlingRight.wqs = False
-            elif move.getEndSq() == (0,7):
-                self.__currentCastlingRight.wks = False
-
-    def getValidMoves(self):    #All moves when in check
-        tempEnpassantPossible = self.__enpassantPossible
-        tempCastleRights = castleRights(self.__currentCastlingRight.wks, self.__currentCastlingRight.bks,
-                                            self.__currentCastlingRight.wqs, self.__currentCastlingRight.bqs)
-        moves = self.getAllPossibleMoves()
-        if self.__whiteToMove:
-            self.getCastleMoves(self.__whiteKingLocation[0], self.__whiteKingLocation[1], moves)
-        else:
-            self.getCastleMoves(self.__blackKingLocation[0], self.__blackKingLocation[1], moves)
-
-        for i in range(len(moves)-1, -1, -1):   #Removes invalid moves that would lead to checkmate
-            self.makeMove(moves[i])
-            self.__whiteToMove = not self.__whiteToMove
-            if self.inCheck():
-                moves.remove(moves[i])
-            self.__whiteToMove = not self.__whiteToMove
-            self.undoMove()
+        self.__castleRights &= CASTLE_MASKS[move.getStartIndex()] & CASTLE_MASKS[move.getEndIndex()]
 
+    def getValidMoves(self):    #All legal moves, found from the pins and checks on the king instead of trying every move
+        moves = []
+        checkers = self.__generateLegalMoves(moves, FULL)
         if len(moves) == 0: #Checkmate or stalemate
-            if self.inCheck():
+            if checkers:
                 self.__checkMate = True
             else:
                 self.__staleMate = True
         else:
             self.__checkMate = False
             self.__staleMate = False
+        return moves
+
+    def getMoveFromID(self, moveID):    #Legal move with the given Move.getMoveID(), or None
+        for move in self.getValidMoves():
+            if move.getMoveID() == moveID:
+                return move
+        return None
 
-        self.__enpassantPossible = tempEnpassantPossible
-        self.__currentCastlingRight = tempCastleRights
+    def getCaptureMoves(self):  #Legal captures only (including enpassant), used by the quiescence search
+        moves = []
+        self.__generateLegalMoves(moves, self.__colorOccupancy[BLACK if self.__whiteToMove else WHITE])
         return moves
 
+    def __generateLegalMoves(self, moves, targetMask):  #Adds every legal move ending on targetMask, returns the pieces giving check
+        us, them = (WHITE, BLACK) if self.__whiteToMove else (BLACK, WHITE)
+        pieces = self.__pieces
+        offset = 6 * us
+        enemyOffset = 6 * them
+        own = self.__colorOccupancy[us]
+        enemy = self.__colorOccupancy[them]
+        occupied = own | enemy
+        kingSq = pieces[WK + offset].bit_length() - 1
+        kingBit = 1 << kingSq
+
+        #Squares the enemy attacks, looking through our king so it can't step back along a checking ray
+        attacked = self.__attackMap(them, occupied ^ kingBit)
+        checkers = self.__attackersTo(kingSq, them, occupied)
+        self.__addMoves(kingSq, KING_ATTACKS[kingSq] & ~own & ~attacked & targetMask, moves)
+        if checkers & (checkers - 1):   #Double check, only the king can move
+            return checkers
+
+        if checkers:    #Other pieces have to capture the checker or block it
+            checkMask = checkers | BETWEEN[kingSq][checkers.bit_length() - 1]
+        else:
+            checkMask = FULL
+            if targetMask == FULL:
+                self.getCastleMoves(kingSq // 8, kingSq % 8, moves, attacked)
+
+        #Pinned pieces can only move along the line between the king and the pinning piece
+        pinned = 0
+        enemyQueens = pieces[WQ + enemyOffset]
+        snipers = (rookAttacks(kingSq, enemy) & (pieces[WR + enemyOffset] | enemyQueens)) | \
+                  (bishopAttacks(kingSq, enemy) & (pieces[WB + enemyOffset] | enemyQueens))
+        while snipers:
+            bit = snipers & -snipers
+            snipers ^= bit
+            blockers = BETWEEN[kingSq][bit.bit_length() - 1] & occupied
+            if blockers and not blockers & (blockers - 1) and blockers & own:
+                pinned |= blockers
+
+        mask = ~own & checkMask & targetMask
+        for piece in (WN, WB, WR, WQ):
+            squares = pieces[piece + offset]
+            while squares:
+                bit = squares & -squares
+                squares ^= bit
+                sq = bit.bit_length() - 1
+                if piece == WN:
+                    if bit & pinned:    #A pinned knight can never move
+                        continue
+                    targets = KNIGHT_ATTACKS[sq]
+                elif piece == WB:
+                    targets = bishopAttacks(sq, occupied)
+                elif piece == WR:
+                    targets = rookAttacks(sq, occupied)
+                else:
+                    targets = rookAttacks(sq, occupied) | bishopAttacks(sq, occupied)
+                targets &= mask
+                if bit & pinned:
+                    targets &= LINE[kingSq][sq]
+                self.__addMoves(sq, targets, moves)
+
+        empty = ~occupied
+        step, startRow = (-8, 6) if us == WHITE else (8, 1)
+        epSq = self.__enpassantSquare
+        squares = pieces[WP + offset]
+        while squares:
+            bit = squares & -squares
+            squares ^= bit
+            sq = bit.bit_length() - 1
+            forward = sq + step
+            targets = 0
+            if 0 <= forward < 64 and (empty >> forward) & 1:    #Square in front is empty
+                targets |= 1 << forward
+                if sq // 8 == startRow and (empty >> (forward + step)) & 1:  #On starting rank, and 2 squares in front is empty
+                    targets |= 1 << (forward + step)
+            targets |= PAWN_ATTACKS[us][sq] & enemy
+            targets &= mask
+            if bit & pinned:
+                targets &= LINE[kingSq][sq]
+            self.__addMoves(sq, targets, moves)
+            if epSq >= 0 and (PAWN_ATTACKS[us][sq] >> epSq) & 1:
+                #Enpassant removes two pieces from one rank, so just check the king is safe once both pawns are gone
+                capturedSq = epSq - step
+                afterOccupied = (occupied ^ bit ^ (1 << capturedSq)) | (1 << epSq)
+                if not self.__attackersTo(kingSq, them, afterOccupied) & ~(1 << capturedSq):
+                    moves.append(Move.fromIndexes(sq, epSq, WP + offset, WP + 6 * them, Move.ENPASSANT))
+        return checkers
+
     def inCheck(self):  #Determine if the player is in check
         if self.__whiteToMove:
-            return self.squareUnderAttack(self.__whiteKingLocation[0], self.__whiteKingLocation[1])
-        else:
-            return self.squareUnderAttack(self.__blackKingLocation[0], self.__blackKingLocation[1])
+            return self.squareUnderAttack(*SQUARES[self.__kingSquare(WHITE)])
+        return self.squareUnderAttack(*SQUARES[self.__kingSquare(BLACK)])
 
     def squareUnderAttack(self, row, col):  #Determine if enemy can attack the square (row, col)
-        self.__whiteToMove = not self.__whiteToMove
-        oppMoves = self.getAllPossibleMoves()
-        self.__whiteToMove = not self.__whiteToMove
-        for move in oppMoves:
-            if move.getEndSq()[0] == row and move.getEndSq()[1] == col:
-                return True
-        return False
+        occupied = self.__colorOccupancy[WHITE] | self.__colorOccupancy[BLACK]
+        return self.__attackersTo(squareIndex(row, col), BLACK if self.__whiteToMove else WHITE, occupied) != 0
+
+    def __attackersTo(self, sq, byColor, occupied):  #Looks outwards from the square with the attack tables to find the attacking pieces
+        pieces = self.__pieces
+        offset = 6 * byColor
+        queens = pieces[WQ + offset]
+        attackers = (KNIGHT_ATTACKS[sq] & pieces[WN + offset]) | (PAWN_ATTACKS[1 - byColor][sq] & pieces[WP + offset]) | \
+                    (KING_ATTACKS[sq] & pieces[WK + offset])
+        attackers |= rookAttacks(sq, occupied) & (pieces[WR + offset] | queens)
+        attackers |= bishopAttacks(sq, occupied) & (pieces[WB + offset] | queens)
+        return attackers & occupied
+
+    def __attackMap(self, color, occupied):  #Every square attacked by the given color
+        pieces = self.__pieces
+        offset = 6 * color
+        pawns = pieces[WP + offset]
+        if color == WHITE:
+            attacked = ((pawns & ~FILE_A) >> 9) | ((pawns & ~FILE_H) >> 7)
+        else:
+            attacked = (((pawns & ~FILE_A) << 7) | ((pawns & ~FILE_H) << 9)) & FULL
+        attacked |= KING_ATTACKS[pieces[WK + offset].bit_length() - 1]
+        for piece, attacks in ((WN, None), (WB, bishopAttacks), (WR, rookAttacks), (WQ, queenAttacks)):
+            squares = pieces[piece + offset]
+            while squares:
+                bit = squares & -squares
+                squares ^= bit
+                sq = bit.bit_length() - 1
+                attacked |= KNIGHT_ATTACKS[sq] if attacks is None else attacks(sq, occupied)
+        return attacked
 
     def getAllPossibleMoves(self):  #All moves in general
         moves = []
-        for row in range(len(self.getBoard())):
-            for col in range(len(self.getBoard()[row])):
-                turn = self.getBoard()[row][col][0]
-                if (turn == "w" and self.__whiteToMove) or (turn == "b" and not self.__whiteToMove):
-                    piece = self.__board[row][col][1]
-                    if piece == "P":
-                        self.getPawnMoves(row, col, moves)
-                    elif piece == "R":
-                        self.getRookMoves(row, col, moves)
-                    elif piece == "N":
-                        self.getKnightMoves(row, col, moves)
-                    elif piece == "B":
-                        self.getBishopMoves(row, col, moves)
-                    elif piece == "Q":  #Queen uses bishop and rook moves
-                        self.getBishopMoves(row, col, moves)
-                        self.getRookMoves(row, col, moves)
-                    elif piece == "K":
-                        self.getKingMoves(row, col, moves)
+        offset = 0 if self.__whiteToMove else 6
+        generators = ((WP, self.getPawnMoves), (WN, self.getKnightMoves), (WB, self.getBishopMoves), (WR, self.getRookMoves),
+                      (WQ, self.getBishopMoves), (WQ, self.getRookMoves), (WK, self.getKingMoves))  #Queen uses bishop and rook moves
+        for piece, generator in generators:
+            squares = self.__pieces[piece + offset]
+            while squares:
+                bit = squares & -squares
+                squares ^= bit
+                row, col = SQUARES[bit.bit_length() - 1]
+                generator(row, col, moves)
         return moves
 
+    def __addMoves(self, startSq, targets, moves):  #Adds a move from startSq to every square in the targets bitboard
+        mailbox = self.__mailbox
+        pieceMoved = mailbox[startSq]
+        newMove = Move.fromIndexes
+        if (pieceMoved == WP or pieceMoved == BP) and targets & (RANK_1 | RANK_8):  #One move for each piece the pawn can promote to
+            while targets:
+                bit = targets & -targets
+                targets ^= bit
+                endSq = bit.bit_length() - 1
+                for promotion in range(len(Move.PROMOTION_PIECES)):
+                    moves.append(newMove(startSq, endSq, pieceMoved, mailbox[endSq], 0, promotion))
+            return
+        while targets:
+            bit = targets & -targets
+            targets ^= bit
+            endSq = bit.bit_length() - 1
+            moves.append(newMove(startSq, endSq, pieceMoved, mailbox[endSq]))
+
     def getPawnMoves(self, row, col, moves):    #Gets all of the valid pawn moves
-        if self.__whiteToMove and row >= 1:  #White pawn moves (SIDE NOTE: DOESNT CALCULATE ON ROW 0)
-            if self.__board[row-1][col] == "--":    #Square above is empty
-                moves.append(Move((row, col), (row-1, col), self.__board))
-                if row == 6 and self.__board[row-2][col] == "--":   #On starting rank, and 2 squares above is empty
-                    moves.append(Move((row, col), (row-2, col), self.__board))
-            if col-1 >= 0:  #Checks to capture a piece from the left
-                if self.__board[row-1][col-1][0] == "b":
-                    moves.append(Move((row, col), (row-1, col-1), self.__board))
-                elif (row-1, col-1) == self.__enpassantPossible:
-                    moves.append(Move((row, col), (row-1, col-1), self.__board, isEnpassantMove=True))
-            if col+1 <= 7:  #Checks to capture a piece from the right
-                if self.__board[row-1][col+1][0] == "b":
-                    moves.append(Move((row, col), (row-1, col+1), self.__board))
-                elif (row-1, col+1) == self.__enpassantPossible:
-                    moves.append(Move((row, col), (row-1, col+1), self.__board, isEnpassantMove=True))
-
-        elif not self.__whiteToMove and row <= 6:   #black pawn moves (SIDE NOTE: DOESNT CALCULATE ON ROW 7)
-            if self.__board[row+1][col] == "--": #Square below is empty
-                moves.append(Move((row, col), (row+1, col), self.__board))
-                if row == 1 and self.__board[row+2][col] == "--":   #On starting rank, and 2 squares below is empty
-                    moves.append(Move((row, col), (row+2, col), self.__board))
-            if col-1 >= 0:  #checks to capture a piece from the left
-                if self.__board[row+1][col-1][0] == "w":
-                    moves.append(Move((row, col), (row+1, col-1), self.__board))
-                elif (row+1, col-1) == self.__enpassantPossible:
-                    moves.append(Move((row, col), (row+1, col-1), self.__board, isEnpassantMove=True))
-            if col+1 <= 7:  #Checks to capture a piece from the right
-                if self.__board[row+1][col+1][0] == "w":
-                    moves.append(Move((row, col), (row+1, col+1), self.__board))
-                elif (row+1, col+1) == self.__enpassantPossible:
-                    moves.append(Move((row, col), (row+1, col+1), self.__board, isEnpassantMove=True))
+        sq = squareIndex(row, col)
+        empty = ~(self.__colorOccupancy[WHITE] | self.__colorOccupancy[BLACK])
+        if self.__whiteToMove:
+            color, enemy, step, startRow = WHITE, self.__colorOccupancy[BLACK], -8, 6
+        else:
+            color, enemy, step, startRow = BLACK, self.__colorOccupancy[WHITE], 8, 1
+        forward = sq + step
+        targets = 0
+        if 0 <= forward < 64 and (empty >> forward) & 1:    #Square in front is empty
+            targets |= 1 << forward
+            if row == startRow and (empty >> (forward + step)) & 1:  #On starting rank, and 2 squares in front is empty
+                targets |= 1 << (forward + step)
+        targets |= PAWN_ATTACKS[color][sq] & enemy
+        self.__addMoves(sq, targets, moves)
+        epSq = self.__enpassantSquare
+        if epSq >= 0:
+            if (PAWN_ATTACKS[color][sq] >> epSq) & 1:
+                moves.append(Move.fromIndexes(sq, epSq, self.__mailbox[sq], BP if color == WHITE else WP, Move.ENPASSANT))
 
     def getRookMoves(self, row, col, moves):    #Gets all of the valid rook moves
-        directions = ((-1, 0), (0, -1), (1, 0), (0, 1))
-        enemyColor = "b" if self.__whiteToMove else "w"
-
-        for d in directions:
-            for i in range(1,8):
-                endRow = row + d[0] * i
-                endCol = col + d[1] * i
-                if 0 <= endRow < 8 and 0 <= endCol < 8:
-                    endPiece = self.__board[endRow][endCol]
-                    if endPiece == "--":
-                        moves.append(Move((row,col), (endRow,endCol), self.__board))
-                    elif endPiece[0] == enemyColor:
-                        moves.append(Move((row,col), (endRow,endCol), self.__board))
-                        break
-                    else:
-                        break
-                else:
-                    break
+        sq = squareIndex(row, col)
+        own = self.__colorOccupancy[WHITE if self.__whiteToMove else BLACK]
+        occupied = self.__colorOccupancy[WHITE] | self.__colorOccupancy[BLACK]
+        self.__addMoves(sq, rookAttacks(sq, occupied) & ~own, moves)
 
     def getKnightMoves(self, row, col, moves):
-        rowNums = [1, 2, 2, 1, -1, -2, -2, -1]
-        colNums = [-2, -1, 1, 2, -2, -1, 1, 2]
-        allyColor = "w" if self.__whiteToMove else "b"
-        for i in range(8):
-                try:
-                    if self.__board[row-rowNums[i]][col-colNums[i]][0] != allyColor and row-rowNums[i] >= 0 and col-colNums[i] >= 0:
-                        moves.append(Move((row, col), (row-rowNums[i], col-colNums[i]), self.__board))
-                except: 
-                    pass
-    
-    def getBishopMoves(self, row, col, moves):
-        directions = ((-1, -1), (-1, 1), (1, -1), (1, 1))
-        enemyColor = "b" if self.__whiteToMove else "w"
-
-        for d in directions:
-            for i in range(1,8):
-                endRow = row + d[0] * i
-                endCol = col + d[1] * i
-                if 0 <= endRow < 8 and 0 <= endCol < 8:
-                    endPiece = self.__board[endRow][endCol]
-                    if endPiece == "--":
-                        moves.append(Move((row,col), (endRow,endCol), self.__board))
-                    elif endPiece[0] == enemyColor:
-                        moves.append(Move((row,col), (endRow,endCol), self.__board))
-                        break
-                    else:
-                        break
-                else:
-                    break
+        sq = squareIndex(row, col)
+        own = self.__colorOccupancy[WHITE if self.__whiteToMove else BLACK]
+        self.__addMoves(sq, KNIGHT_ATTACKS[sq] & ~own, moves)
 
-    
+    def getBishopMoves(self, row, col, moves):
+        sq = squareIndex(row, col)
+        own = self.__colorOccupancy[WHITE if self.__whiteToMove else BLACK]
+        occupied = self.__colorOccupancy[WHITE] | self.__colorOccupancy[BLACK]
+        self.__addMoves(sq, bishopAttacks(sq, occupied) & ~own, moves)
 
-    
     def getKingMoves(self, row, col, moves):
-        rowNums = [1,1,1,0,0,-1,-1,-1]
-        colNums = [-1,0,1,-1,1,-1,0,1]
-        allyColor = "w" if self.__whiteToMove else "b"
-        for i in range(8):
-                try:
-                    if self.__board[row-rowNums[i]][col-colNums[i]][0] != allyColor and row-rowNums[i] >= 0 and col-colNums[i] >= 0:
-                        moves.append(Move((row, col), (row-rowNums[i], col-colNums[i]), self.__board))
-                except: 
-                     pass
-
-    def getCastleMoves(self, row, col, moves):
-        if self.squareUnderAttack(row,col):
-            return
-        if (self.__whiteToMove and self.__currentCastlingRight.wks) or (not self.__whiteToMove and self.__currentCastlingRight.bks):
-            self.getKingSideCastleMoves(row,col,moves)
-        if (self.__whiteToMove and self.__currentCastlingRight.wqs) or (not self.__whiteToMove and self.__currentCastlingRight.bqs):
-            self.getQueenSideCastleMoves(row,col,moves)
-        
-    def getKingSideCastleMoves(self, row, col, moves):
-        if self.__board[row][col+1] == "--" and self.__board[row][col+2] == "--":
-            if not self.squareUnderAttack(row, col+1) and not self.squareUnderAttack(row, col+2):
-                moves.append(Move((row, col), (row, col+2), self.__board, isCastleMove=True))
-
-    def getQueenSideCastleMoves(self, row, col, moves):
-        if self.__board[row][col-1] == "--" and self.__board[row][col-2] == "--" and self.__board[row][col-3] == "--":
-            if not self.squareUnderAttack(row, col-1) and not self.squareUnderAttack(row, col-2) and not self.squareUnderAttack(row, col-3):
-                moves.append(Move((row, col), (row, col-2), self.__board, isCastleMove=True))
-
-class castleRights():
-    def __init__(self, wks, bks, wqs, bqs):
-        self.wks = wks
-        self.bks = bks
-        self.wqs = wqs
-        self.bqs = bqs
-    def __str__(self):
-        return "WKS:" + str(self.wks) + " " + "WQS:" + str(self.wqs) + " " + "BKS:" + str(self.bks) + " " + "BQS:" + str(self.bqs)
+        sq = squareIndex(row, col)
+        own = self.__colorOccupancy[WHITE if self.__whiteToMove else BLACK]
+        self.__addMoves(sq, KING_ATTACKS[sq] & ~own, moves)
 
+    def getCastleMoves(self, row, col, moves, attacked):    #attacked is the enemy attack map from __attackMap
+        if (attacked >> squareIndex(row, col)) & 1:
+            return
+        if self.__castleRights & (WHITE_KING_SIDE if self.__whiteToMove else BLACK_KING_SIDE):
+            self.getKingSideCastleMoves(row,col,moves,attacked)
+        if self.__castleRights & (WHITE_QUEEN_SIDE if self.__whiteToMove else BLACK_QUEEN_SIDE):
+            self.getQueenSideCastleMoves(row,col,moves,attacked)
+
+    def getKingSideCastleMoves(self, row, col, moves, attacked):
+        sq = squareIndex(row, col)
+        path = (1 << (sq+1)) | (1 << (sq+2))
+        if not path & (self.__colorOccupancy[WHITE] | self.__colorOccupancy[BLACK]) and not path & attacked:
+            moves.append(Move.fromIndexes(sq, sq+2, self.__mailbox[sq], EMPTY, Move.CASTLE))
+
+    def getQueenSideCastleMoves(self, row, col, moves, attacked):
+        sq = squareIndex(row, col)
+        path = (1 << (sq-1)) | (1 << (sq-2))
+        #The b file square has to be empty for the rook, but the king never crosses it so it can be attacked
+        if not (path | (1 << (sq-3))) & (self.__colorOccupancy[WHITE] | self.__colorOccupancy[BLACK]) and not path & attacked:
+            moves.append(Move.fromIndexes(sq, sq-2, self.__mailbox[sq], EMPTY, Move.CASTLE))
 
 class Move():
+    #Moves are made thousands of times per search, so they only hold small ints in slots and the
+    #getters return shared tuples/strings instead of building new ones
+    __slots__ = ("__startSq", "__endSq", "__pieceMoved", "__pieceCaptured", "__flags", "__promotion", "__moveID")
 
     ranksToRows = {"1": 7, "2": 6, "3": 5, "4": 4,
                    "5": 3, "6": 2, "7": 1, "8": 0}
@@ -358,63 +590,121 @@ class Move():
                    "e": 4, "f": 5, "g": 6, "h": 7}
     colsToFiles = {v: k for k, v in filesToCols.items()}
 
-    def __init__(self, startSq, endSq, board, isEnpassantMove = False, isCastleMove = False):
-        self.__startRow = startSq[0]
-        self.__startCol = startSq[1]
-        self.__endRow = endSq[0]
-        self.__endCol = endSq[1]
-        self.__pieceMoved = board[self.__startRow][self.__startCol]
-        self.__pieceCaptured = board[self.__endRow][self.__endCol]
-        self.__isPawnPromotion = (self.__pieceMoved == "wP" and self.getEndSq()[0] == 0) or (self.__pieceMoved == "bP" and self.getEndSq()[0] == 7)
-        self.__isEnpassantMove = isEnpassantMove
-        if self.__isEnpassantMove:
-            self.__pieceCaptured = "wP" if self.__pieceMoved == "bP" else "bP"
-        self.__isCastleMove = isCastleMove
-        self.__isCapture = self.__pieceCaptured != "--"
-        self.__moveID = self.__startRow * 1000 + self.__startCol * 100 + self.__endRow * 10 + self.__endCol
+    #Flag bits
+    ENPASSANT = 1
+    CASTLE = 2
+    PROMOTION = 4
+
+    #White piece a pawn promotes to, indexed by the promotion number kept in bits 12-13 of the moveID.
+    #Queen is 0 so a move built from two clicks matches the queen promotion
+    PROMOTION_PIECES = (WQ, WR, WB, WN)
+
+    def __init__(self, startSq, endSq, board, isEnpassantMove = False, isCastleMove = False, promotion = 0):
+        pieceMoved = PIECE_CODES[board[startSq[0]][startSq[1]]]
+        pieceCaptured = PIECE_CODES[board[endSq[0]][endSq[1]]]
+        flags = (self.ENPASSANT if isEnpassantMove else 0) | (self.CASTLE if isCastleMove else 0)
+        if isEnpassantMove:
+            pieceCaptured = BP if pieceMoved == WP else WP
+        self.__setFields(squareIndex(startSq[0], startSq[1]), squareIndex(endSq[0], endSq[1]), pieceMoved, pieceCaptured, flags, promotion)
+
+    #Used by the move generators, which already know the square indexes and piece codes
+    @classmethod
+    def fromIndexes(cls, startSq, endSq, pieceMoved, pieceCaptured = EMPTY, flags = 0, promotion = 0):
+        move = cls.__new__(cls)
+        move.__setFields(startSq, endSq, pieceMoved, pieceCaptured, flags, promotion)
+        return move
+
+    def __setFields(self, startSq, endSq, pieceMoved, pieceCaptured, flags, promotion):
+        if (pieceMoved == WP and endSq < 8) or (pieceMoved == BP and endSq >= 56):
+            flags |= self.PROMOTION
+        else:
+            promotion = 0
+        self.__startSq = startSq
+        self.__endSq = endSq
+        self.__pieceMoved = pieceMoved
+        self.__pieceCaptured = pieceCaptured
+        self.__flags = flags
+        self.__promotion = promotion
+        self.__moveID = startSq | (endSq << 6) | (promotion << 12)  #16 bit move code, the same for a move however it was built
 
     def __eq__(self, other):
         if isinstance(other, Move):
             return self.__moveID == other.__moveID
         return False
 
+    def __hash__(self):
+        return self.__moveID
+
+    def getMoveID(self):
+        return self.__moveID
+
     def getStartSq(self):
-        return (self.__startRow, self.__startCol)
+        return SQUARES[self.__startSq]
 
     def getEndSq(self):
-        return (self.__endRow, self.__endCol)
+        return SQUARES[self.__endSq]
+
+    def getStartIndex(self):
+        return self.__startSq
+
+    def getEndIndex(self):
+        return self.__endSq
 
     def getPieceMoved(self):
-        return self.__pieceMoved
+        return PIECE_NAMES[self.__pieceMoved]
 
     def getPieceCaptured(self):
+        return PIECE_NAMES[self.__pieceCaptured]
+
+    def getPieceMovedCode(self):
+        return self.__pieceMoved
+
+    def getPieceCapturedCode(self):
         return self.__pieceCaptured
 
+    def getFlags(self):
+        return self.__flags
+
+    def getPromotion(self):     #Index into PROMOTION_PIECES, 0 if the move isn't a promotion
+        return self.__promotion
+
+    def getPromotionPieceCode(self):
+        if not self.__flags & self.PROMOTION:
+            return EMPTY
+        return self.PROMOTION_PIECES[self.__promotion] + (6 if self.__pieceMoved == BP else 0)
+
     def isPawnPromotion(self):
-        return self.__isPawnPromotion
+        return self.__flags & self.PROMOTION != 0
 
     def isEnpassantMove(self):
-        return self.__isEnpassantMove
+        return self.__flags & self.ENPASSANT != 0
 
     def isCastleMove(self):
-        return self.__isCastleMove
+        return self.__flags & self.CASTLE != 0
 
     def getChessNotation(self):
-        return self.getRankFile(self.__startRow, self.__startCol) + self.getRankFile(self.__endRow, self.__endCol)
+        notation = self.getRankFile(*SQUARES[self.__startSq]) + self.getRankFile(*SQUARES[self.__endSq])
+        if self.isPawnPromotion():
+            notation += "qrbn"[self.__promotion]
+        return notation
 
     def getRankFile(self, r, c):
         return self.colsToFiles[c] + self.rowsToRanks[r]
 
     def __str__(self):
-        if self.__isCastleMove:
-            return "0-0" if self.__endCol == 6 else "0-0-0"
-        endSquare = self.getRankFile(self.__endRow, self.__endCol)
-        if self.__pieceMoved[1] == "P":
-            if self.__isCapture:
-                return self.colsToFiles[self.__startCol] + "x" + endSquare
-            else:
-                return endSquare
-        moveString = self.__pieceMoved[1]
-        if self.__isCapture:
+        endRow, endCol = SQUARES[self.__endSq]
+        if self.isCastleMove():
+            return "0-0" if endCol == 6 else "0-0-0"
+        endSquare = self.getRankFile(endRow, endCol)
+        isCapture = self.__pieceCaptured != EMPTY
+        pieceMoved = self.getPieceMoved()
+        if pieceMoved[1] == "P":
+            if isCapture:
+                endSquare = self.colsToFiles[SQUARES[self.__startSq][1]] + "x" + endSquare
+            if self.isPawnPromotion():
+                endSquare += "=" + "QRBN"[self.__promotion]
+            return endSquare
+        moveString = pieceMoved[1]
+        if isCapture:
             moveString += "x"
-        return moveString + endSquare
\ No newline at end of file
+        return moveString + endSquare
@@ -6,7 +6,7 @@
 import pygame as p
 from ChessEngine import GameState, Move
 import ChessAI
-from multiprocessing import Process, Queue
+from ChessWorker import EngineWorker
 
 BOARD_WIDTH = BOARD_HEIGHT = 512
 MOVE_LOG_PANEL_WIDTH = 200
@@ -14,6 +14,7 @@ MOVE_LOG_PANEL_HEIGHT = BOARD_HEIGHT
 DIMENSION = 8
 SQ_SIZE = BOARD_HEIGHT // DIMENSION
 MAX_FPS = 5
+AI_MOVE_TIME = 3    #Seconds the AI gets to think per move
 IMAGES = {}
 
 #UI Elements
@@ -71,6 +72,7 @@ def drawMoveLog(screen, gs, font):
     moveLogRect = p.Rect(BOARD_WIDTH, 0, MOVE_LOG_PANEL_WIDTH, MOVE_LOG_PANEL_HEIGHT)
     p.draw.rect(screen, p.Color("black"), moveLogRect)
     moveLog = gs.getMoveLog()
+    ratingLog = gs.getBoardRatingLog()  #Built from the history on every call, so only once per frame
     moveText = []
     padding = 18
     for i in range(0, len(moveLog), 2):
@@ -87,9 +89,9 @@ def drawMoveLog(screen, gs, font):
         textLocation = moveLogRect.move(4, 4 + padding * counter)
         screen.blit(textObject, textLocation)
         try:
-            text = str(gs.getBoardRatingLog()[i*2] / 10) + "  " + str(gs.getBoardRatingLog()[i*2 + 1] / 10)
+            text = str(ratingLog[i*2] / 10) + "  " + str(ratingLog[i*2 + 1] / 10)
         except:
-            text = str(gs.getBoardRatingLog()[i*2] / 10)
+            text = str(ratingLog[i*2] / 10)
         textObject = font.render(text, True, p.Color("white"))
         textLocation = moveLogRect.move(MOVE_LOG_PANEL_WIDTH - textObject.get_width() - padding, 4 + padding * i)
         screen.blit(textObject, textLocation)
@@ -114,7 +116,7 @@ if __name__ == "__main__":
     playerOne = True    # If human playing True, if AI playing False
     playerTwo = False   # Same as above
     AIThinking = False
-    moveFinderProcess = None
+    worker = EngineWorker()     #Engine process kept alive for the whole game, it mirrors every move made here
     
     while running:
         humanTurn = (gs.getWhiteToMove() and playerOne) or (not gs.getWhiteToMove() and playerTwo)
@@ -140,6 +142,7 @@ if __name__ == "__main__":
                         if move == validMoves[i]:
                             #print(move.getChessNotation())
                             gs.makeMove(validMoves[i])
+                            worker.makeMove(validMoves[i])
                             moveMade = True
                             sqSelected = ()
                             playerClicks = []
@@ -153,14 +156,18 @@ if __name__ == "__main__":
             if e.type == p.KEYDOWN:
                 if e.key == p.K_z:  #Undos a Move (When pressing the Z key)
                     gs.undoMove()
+                    worker.undoMove()
                     moveMade = True
                     gameOver = False
+                    AIThinking = False
                 if e.key == p.K_r:  #Resets the board (When pressing R key)
                     sqSelected = ()
                     playerClicks = []
                     moveMade = False
                     gameOver = False
+                    AIThinking = False
                     gs = GameState()
+                    worker.newGame()
                     validMoves = gs.getValidMoves()
                 if e.key == p.K_m:
                     drawMovePanel = not drawMovePanel
@@ -174,17 +181,16 @@ if __name__ == "__main__":
             if not AIThinking:
                 AIThinking = True
                 print("Thinking...")
-                returnQueue = Queue()
-                moveFinderProcess = Process(target=ChessAI.findBestMove, args=(gs, validMoves, returnQueue))
-                #moveFinderProcess = Process(target=ChessAI.findBestMoveMinMax, args=(gs, validMoves, returnQueue))
-                moveFinderProcess.start()
+                worker.startSearch(AI_MOVE_TIME)
 
-            if not moveFinderProcess.is_alive():
+            AIMoveID = worker.getBestMoveID()
+            if AIMoveID is not None:
                 print("Done Thinking :D")
-                AIMove = returnQueue.get()
+                AIMove = gs.getMoveFromID(AIMoveID)
                 if AIMove is None:
                     AIMove = ChessAI.findRandomMove(validMoves)
                 gs.makeMove(AIMove)
+                worker.makeMove(AIMove)
                 moveMade = True
                 AIThinking = False
 
@@ -211,6 +217,14 @@ if __name__ == "__main__":
         elif gs.getStaleMate():
             gameOver = True
             drawEndGameText(screen, "Stalemate", p.Color("Black"), (177,228,185))
+        elif gs.isThreefoldRepetition():
+            gameOver = True
+            drawEndGameText(screen, "Draw by repetition", p.Color("Black"), (177,228,185))
+        elif gs.isFiftyMoveRule():
+            gameOver = True
+            drawEndGameText(screen, "Draw by fifty move rule", p.Color("Black"), (177,228,185))
 
         clock.tick(MAX_FPS)
         p.display.flip()
+
+    worker.close()
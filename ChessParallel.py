@@ -0,0 +1,105 @@
+## Name - ChessParallel.py
+## Purpose - Parallel versions of the ChessAI search that spread the work over several processes
+## Author - Ryan Brosius
+## Date - 10/18/2026
+
+import os
+import random
+from multiprocessing import Process, Queue, Event, shared_memory
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import ChessAI
+from ChessEngine import GameState
+
+#Lazy SMP: every process searches the same root, and they help each other through one
+#transposition table in shared memory. A helper that finds a line first leaves its result for the others.
+#Workers get the position as a FEN string, which is much smaller to send than a pickled GameState
+def lazySMPWorker(fen, workerIndex, hashName, hashSizeMB, maxDepth, timeLimit, nodeLimit, stop, resultQueue):
+    random.seed(os.getpid() * 31 + workerIndex)     #Helpers shuffle the root moves differently
+    gs = GameState.fromFen(fen)
+    sharedHash = shared_memory.SharedMemory(name=hashName)
+    searcher = ChessAI.Searcher(ChessAI.TranspositionTable(hashSizeMB, sharedHash.buf))
+    startDepth = 1 + workerIndex % 2    #Every other helper starts a ply deeper, so they don't all finish the same depths together
+    move = searcher.iterativeDeepening(gs, gs.getValidMoves(), maxDepth, timeLimit, nodeLimit, stop, startDepth)
+    if workerIndex == 0:    #Main searcher is done, helpers can stop
+        stop.set()
+    resultQueue.put((workerIndex, move.getMoveID() if move is not None else 0, searcher.getCompletedDepth(), searcher.getBestScore(), searcher.getNodes()))
+    searcher.getTranspositionTable().release()
+    sharedHash.close()
+
+#Returns (best move, score, depth, total nodes). nodeLimit is per process
+def lazySMPSearch(gs, timeLimit = None, nodeLimit = None, maxDepth = None, processes = None, hashSizeMB = ChessAI.HASH_SIZE_MB):
+    processes = processes or os.cpu_count() or 1
+    if maxDepth is None:
+        maxDepth = ChessAI.DEPTH if timeLimit is None and nodeLimit is None else ChessAI.MAX_DEPTH
+    sharedHash = shared_memory.SharedMemory(create=True, size=ChessAI.TranspositionTable.getBytes(hashSizeMB))
+    stop = Event()
+    resultQueue = Queue()
+    fen = gs.toFen()
+    workers = [Process(target=lazySMPWorker, args=(fen, i, sharedHash.name, hashSizeMB, maxDepth, timeLimit, nodeLimit, stop, resultQueue))
+               for i in range(processes)]
+    for worker in workers:
+        worker.start()
+    results = [resultQueue.get() for worker in workers]
+    for worker in workers:
+        worker.join()
+    sharedHash.close()
+    sharedHash.unlink()
+
+    #Deepest finished search wins, ties go to the main searcher
+    results.sort(key=lambda result: (result[2], result[0] == 0), reverse=True)
+    workerIndex, moveID, depth, score, nodes = results[0]
+    return gs.getMoveFromID(moveID), score, depth, sum(result[4] for result in results)
+
+#Same interface as ChessAI.findBestMove
+def findBestMoveParallel(gs, validMoves, returnQueue, timeLimit = None, nodeLimit = None, processes = None):
+    bestMove, score, depth, nodes = lazySMPSearch(gs, timeLimit, nodeLimit, processes=processes)
+    print(nodes, "nodes, depth", depth)
+    returnQueue.put(bestMove)
+
+#Root split: each root move's subtree is searched as its own task in a process pool. Every task gets a
+#fresh Searcher, and the window is opened a little below alpha so every move that ties the best comes
+#back with an exact score. That keeps the result the same no matter which task finishes first
+ROOT_SPLIT_MARGIN = 0.01
+
+def searchRootMove(fen, moveID, depth, alpha, hashSizeMB):  #Returns (moveID, score, nodes) for one root move
+    gs = GameState.fromFen(fen)
+    searcher = ChessAI.Searcher(ChessAI.TranspositionTable(hashSizeMB))
+    searcher.startSearch(depth)
+    gs.makeMove(gs.getMoveFromID(moveID))
+    turnMultiplier = 1 if gs.getWhiteToMove() else -1
+    score = -searcher.findMoveNegaMaxAlphaBeta(gs, gs.getValidMoves(), depth - 1, -ChessAI.CHECKMATE, -alpha, turnMultiplier)
+    return moveID, score, searcher.getNodes()
+
+#Returns (best move, best score, [(move, score, nodes) for every root move]). Scores below the best
+#are upper bounds, since those moves were searched with the best score found so far as alpha
+def rootSplitSearch(gs, depth = ChessAI.DEPTH, processes = None, hashSizeMB = 4):
+    processes = processes or os.cpu_count() or 1
+    validMoves = ChessAI.Searcher(ChessAI.TranspositionTable(0)).orderMoves(gs.getValidMoves(), 0, 0)
+    if len(validMoves) == 0:
+        return None, 0, []
+
+    fen = gs.toFen()
+    results = {}
+    with ProcessPoolExecutor(processes) as pool:
+        #First move is searched alone to get a good alpha for the rest
+        moveID, alpha, nodes = pool.submit(searchRootMove, fen, validMoves[0].getMoveID(), depth, -ChessAI.CHECKMATE, hashSizeMB).result()
+        results[0] = (alpha, nodes)
+        pending = {}
+        nextIndex = 1
+        while nextIndex < len(validMoves) or pending:
+            while nextIndex < len(validMoves) and len(pending) < processes:
+                future = pool.submit(searchRootMove, fen, validMoves[nextIndex].getMoveID(), depth, alpha - ROOT_SPLIT_MARGIN, hashSizeMB)
+                pending[future] = nextIndex
+                nextIndex += 1
+            done, notDone = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                moveID, score, nodes = future.result()
+                results[pending.pop(future)] = (score, nodes)
+                alpha = max(alpha, score)  #Later tasks start with the best score found so far
+
+    scores = [(validMoves[i], results[i][0], results[i][1]) for i in range(len(validMoves))]
+    bestIndex = 0
+    for i in range(1, len(scores)):    #Ties go to the move that came first in the ordering
+        if scores[i][1] > scores[bestIndex][1]:
+            bestIndex = i
+    return scores[bestIndex][0], scores[bestIndex][1], scores
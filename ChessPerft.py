@@ -0,0 +1,77 @@
+## Name - ChessPerft.py
+## Purpose - Counts the positions reachable in n moves to check the move generator against known results and time it
+## Author - Ryan Brosius
+## Date - 10/18/2026
+
+import argparse
+import time
+from ChessEngine import GameState
+
+#(name, FEN, known node counts for depth 1, 2, 3...)
+POSITIONS = [
+    ("initial", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [48, 2039, 97862, 4085603]),
+    ("position 3 (enpassant pins)", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238, 674624]),
+    ("position 4 (promotions, castling)", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", [6, 264, 9467, 422333]),
+    ("position 5 (promotion captures)", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379, 2103487]),
+    ("position 6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", [46, 2079, 89890, 3894594]),
+]
+
+def perft(gs, depth):   #Number of move sequences depth moves long
+    moves = gs.getValidMoves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1  #Leaves are counted without making the moves
+    nodes = 0
+    for move in moves:
+        gs.makeMove(move)
+        nodes += perft(gs, depth - 1)
+        gs.undoMove()
+    return nodes
+
+def divide(gs, depth):  #Prints the count below every root move, for finding which move a bad count comes from
+    total = 0
+    for move in gs.getValidMoves():
+        gs.makeMove(move)
+        nodes = perft(gs, depth - 1)
+        gs.undoMove()
+        print(move.getChessNotation() + ":", nodes)
+        total += nodes
+    print("total:", total)
+    return total
+
+def timedPerft(gs, depth):  #Returns (nodes, seconds)
+    startTime = time.perf_counter()
+    nodes = perft(gs, depth)
+    return nodes, time.perf_counter() - startTime
+
+def runSuite(maxDepth = 3):     #Runs every standard position up to maxDepth, returns True if every count was right
+    allPassed = True
+    totalNodes = 0
+    totalTime = 0
+    for name, fen, expected in POSITIONS:
+        gs = GameState.fromFen(fen)
+        for depth in range(1, min(maxDepth, len(expected)) + 1):
+            nodes, seconds = timedPerft(gs, depth)
+            passed = nodes == expected[depth - 1]
+            allPassed = allPassed and passed
+            totalNodes += nodes
+            totalTime += seconds
+            print("%-34s depth %d %10d nodes %8.3fs %9.0f nodes/sec %s" % (name, depth, nodes, seconds, nodes / max(seconds, 1e-9),
+                  "ok" if passed else "FAILED, expected " + str(expected[depth - 1])))
+    print("%d nodes in %.3fs, %.0f nodes/sec" % (totalNodes, totalTime, totalNodes / max(totalTime, 1e-9)))
+    return allPassed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Perft counts for the ChessEngine move generator")
+    parser.add_argument("--depth", type=int, default=3, help="deepest depth to search")
+    parser.add_argument("--fen", help="count this position instead of running the standard positions")
+    parser.add_argument("--divide", action="store_true", help="print the count below every root move")
+    args = parser.parse_args()
+    if args.fen is None:
+        raise SystemExit(0 if runSuite(args.depth) else 1)
+    gs = GameState.fromFen(args.fen)
+    if args.divide:
+        divide(gs, args.depth)
+    else:
+        nodes, seconds = timedPerft(gs, args.depth)
+        print("%d nodes in %.3fs, %.0f nodes/sec" % (nodes, seconds, nodes / max(seconds, 1e-9)))
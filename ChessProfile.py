@@ -0,0 +1,133 @@
+## Name - ChessProfile.py
+## Purpose - Opt in timers around the hot engine functions, to see where search time goes
+## Author - Ryan Brosius
+## Date - 10/18/2026
+
+import cProfile
+import itertools
+import os
+import time
+from contextlib import contextmanager
+import ChessAI
+from ChessEngine import GameState
+
+#Set CHESS_PROFILE to a directory to time every search the worker runs (see profileSearches).
+#Nothing is wrapped unless profiling is turned on, so the engine runs at full speed otherwise
+PROFILE_DIRECTORY = os.environ.get("CHESS_PROFILE")
+
+#(owner, attribute name, name in the report). Some of these call each other (getValidMoves and getCaptureMoves both
+#run __generateLegalMoves), so the report splits each one's time into total and self time, which leaves out the
+#time spent in the other wrapped functions it called
+HOT_FUNCTIONS = [
+    (GameState, "getValidMoves", "GameState.getValidMoves"),
+    (GameState, "getCaptureMoves", "GameState.getCaptureMoves"),
+    (GameState, "_GameState__generateLegalMoves", "GameState.__generateLegalMoves"),
+    (GameState, "getAllPossibleMoves", "GameState.getAllPossibleMoves"),
+    (GameState, "inCheck", "GameState.inCheck"),
+    (GameState, "makeMove", "GameState.makeMove"),
+    (GameState, "undoMove", "GameState.undoMove"),
+    (ChessAI, "scoreBoard", "ChessAI.scoreBoard"),
+    (ChessAI.Searcher, "orderMoves", "Searcher.orderMoves"),
+]
+
+#Call counts, total time and self time per function, filled in by the wrappers instrument puts in place
+class Profile():
+    def __init__(self):
+        self.__calls = {}
+        self.__times = {}
+        self.__selfTimes = {}
+        self.__childTimes = [0]     #Time spent in wrapped calls made by each wrapped call still running, innermost last
+        self.__seconds = 0  #Wall time of the whole profiled block
+
+    def enter(self):    #Called as a wrapped function starts
+        self.__childTimes.append(0)
+
+    def record(self, name, seconds):    #Called as a wrapped function returns, with its total time
+        childTime = self.__childTimes.pop()
+        self.__childTimes[-1] += seconds
+        self.__calls[name] = self.__calls.get(name, 0) + 1
+        self.__times[name] = self.__times.get(name, 0) + seconds
+        self.__selfTimes[name] = self.__selfTimes.get(name, 0) + seconds - childTime
+
+    def getCalls(self):
+        return self.__calls
+
+    def getTimes(self):
+        return self.__times
+
+    def getSelfTimes(self):
+        return self.__selfTimes
+
+    def getSeconds(self):
+        return self.__seconds
+
+    def setSeconds(self, seconds):
+        self.__seconds = seconds
+
+    def report(self):
+        lines = ["%-32s %10s %10s %10s %10s %7s" % ("function", "calls", "total s", "self s", "self us", "% self")]
+        for name in sorted(self.__selfTimes, key=self.__selfTimes.get, reverse=True):
+            calls = self.__calls[name]
+            selfTime = self.__selfTimes[name]
+            lines.append("%-32s %10d %10.3f %10.3f %10.1f %6.1f%%" % (name, calls, self.__times[name], selfTime, selfTime / calls * 1e6,
+                                                                       100 * selfTime / self.__seconds if self.__seconds else 0))
+        lines.append("total %.3fs, self times leave out the wrapped functions called inside" % self.__seconds)
+        return "\n".join(lines)
+
+def __timed(function, name, profile):
+    def wrapper(*args, **kwargs):
+        profile.enter()
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profile.record(name, time.perf_counter() - start)
+    return wrapper
+
+def instrument(profile):    #Wraps every hot function, returns what uninstrument needs to put the originals back
+    originals = []
+    for owner, attribute, name in HOT_FUNCTIONS:
+        function = getattr(owner, attribute)
+        originals.append((owner, attribute, function))
+        setattr(owner, attribute, __timed(function, name, profile))
+    return originals
+
+def uninstrument(originals):
+    for owner, attribute, function in reversed(originals):
+        setattr(owner, attribute, function)
+
+#with profiled() as profile: ... times the hot functions inside the block and prints the report at the end.
+#Given pstatsPath, cProfile also runs and its stats are saved there for pstats/snakeviz
+@contextmanager
+def profiled(pstatsPath = None, printReport = True):
+    profile = Profile()
+    originals = instrument(profile)
+    profiler = cProfile.Profile() if pstatsPath is not None else None
+    startTime = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield profile
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(pstatsPath)
+        profile.setSeconds(time.perf_counter() - startTime)
+        uninstrument(originals)
+        if printReport:
+            print(profile.report())
+
+#Profiles every Searcher.iterativeDeepening from now on, each search writes search-<pid>-<n>.txt (the report)
+#and search-<pid>-<n>.prof (cProfile stats) into directory
+def profileSearches(directory):
+    os.makedirs(directory, exist_ok=True)
+    search = ChessAI.Searcher.iterativeDeepening
+    searchNumbers = itertools.count(1)
+    def profiledSearch(self, *args, **kwargs):
+        baseName = os.path.join(directory, "search-%d-%d" % (os.getpid(), next(searchNumbers)))
+        with profiled(baseName + ".prof", False) as profile:
+            move = search(self, *args, **kwargs)
+        with open(baseName + ".txt", "w") as file:
+            file.write(profile.report() + "\n")
+        return move
+    ChessAI.Searcher.iterativeDeepening = profiledSearch
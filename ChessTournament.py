@@ -0,0 +1,245 @@
+## Name - ChessTournament.py
+## Purpose - Plays two ChessAI configurations against each other without the UI to see which one is stronger
+## Author - Ryan Brosius
+## Date - 10/18/2026
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import ChessAI
+import ChessBook
+from ChessEngine import GameState
+from ChessBitboard import EMPTY
+
+UNKNOWN_TABLES = object()   #Tables left by an earlier game in the same pool process, could be anyone's
+MAX_GAME_PLIES = 600    #Games still going after this many moves are scored as a draw, repetition and the fifty move rule end most before this
+
+#Openings the games start from, as moves from the initial position. Every opening is played twice with the colors swapped
+OPENINGS = [
+    "",
+    "e2e4 e7e5 g1f3 b8c6",
+    "e2e4 c7c5 g1f3 d7d6",
+    "e2e4 e7e6 d2d4 d7d5",
+    "e2e4 c7c6 d2d4 d7d5",
+    "d2d4 d7d5 c2c4 e7e6",
+    "d2d4 g8f6 c2c4 g7g6",
+    "d2d4 d7d5 c2c4 c7c6",
+    "c2c4 e7e5 b1c3 g8f6",
+    "g1f3 d7d5 g2g3 g8f6",
+]
+
+#A player is a dict: {"name": str, "depth": int, "timeLimit": seconds or None, "nodeLimit": int or None,
+#"tables": path of a ChessAI.savePieceSquareScores file or None for the built in tables, "book": path of a ChessBook file or None}
+def makePlayer(name, depth = ChessAI.DEPTH, timeLimit = None, nodeLimit = None, tables = None, book = None):
+    return {"name": name, "depth": depth, "timeLimit": timeLimit, "nodeLimit": nodeLimit, "tables": tables, "book": book}
+
+def openingPosition(opening):   #FEN after playing the opening's moves
+    gs = GameState()
+    for notation in opening.split():
+        move = next(move for move in gs.getValidMoves() if move.getChessNotation() == notation)
+        gs.makeMove(move)
+    return gs.toFen()
+
+def toSan(gs, move, validMoves):    #Standard algebraic notation of a legal move, call before the move is made
+    if move.isCastleMove():
+        san = "O-O" if move.getEndIndex() > move.getStartIndex() else "O-O-O"
+    else:
+        piece = move.getPieceMoved()[1]
+        capture = move.getPieceCapturedCode() != EMPTY
+        target = move.getChessNotation()[2:4]
+        if piece == "P":
+            san = (move.getChessNotation()[0] + "x" if capture else "") + target
+            if move.isPawnPromotion():
+                san += "=" + "QRBN"[move.getPromotion()]
+        else:
+            start = move.getChessNotation()[:2]
+            rivals = [other.getChessNotation()[:2] for other in validMoves if other.getPieceMoved() == move.getPieceMoved()
+                      and other.getEndIndex() == move.getEndIndex() and other.getStartIndex() != move.getStartIndex()]
+            prefix = ""
+            if rivals:
+                if all(rival[0] != start[0] for rival in rivals):
+                    prefix = start[0]
+                elif all(rival[1] != start[1] for rival in rivals):
+                    prefix = start[1]
+                else:
+                    prefix = start
+            san = piece + prefix + ("x" if capture else "") + target
+    gs.makeMove(move)
+    if gs.inCheck():
+        san += "#" if len(gs.getValidMoves()) == 0 else "+"
+    gs.undoMove()
+    return san
+
+def loadTables(path, loadedTables):     #Puts the player's eval tables in place if they aren't already, returns the path now loaded
+    if path == loadedTables:
+        return loadedTables
+    if path is None:
+        ChessAI.setPieceSquareScores(ChessAI.buildPieceSquareScores(), ChessAI.buildPieceSquareScores(ChessAI.endgameLocationTables))
+    else:
+        ChessAI.loadPieceSquareScores(path)
+    return path
+
+#Plays one game in a pool process. Each player has its own Searcher, and searches a fresh GameState set up with its
+#own eval tables loaded, so its ratings come from them
+def playGame(gameIndex, fen, white, black):
+    random.seed(gameIndex)  #Root moves are shuffled, seeding keeps a game repeatable
+    players = (white, black)
+    searchers = (ChessAI.Searcher(ChessAI.TranspositionTable(8)), ChessAI.Searcher(ChessAI.TranspositionTable(8)))
+    for searcher, player in zip(searchers, players):
+        if player.get("book") is not None:
+            searcher.setOpeningBook(ChessBook.OpeningBook(player["book"]))
+    loadedTables = UNKNOWN_TABLES   #None means the built in tables, so it can't also mean nothing is known
+    gs = GameState.fromFen(fen)
+    moves = []
+    moveTimes = ([], [])
+    nodes = [0, 0]
+    searchSeconds = [0, 0]
+    result, termination = "1/2-1/2", "move limit"
+    for ply in range(MAX_GAME_PLIES):
+        validMoves = gs.getValidMoves()
+        if gs.getCheckMate():
+            result, termination = ("0-1" if gs.getWhiteToMove() else "1-0"), "checkmate"
+            break
+        if gs.getStaleMate():
+            result, termination = "1/2-1/2", "stalemate"
+            break
+        if gs.isThreefoldRepetition():
+            result, termination = "1/2-1/2", "threefold repetition"
+            break
+        if gs.isFiftyMoveRule():
+            result, termination = "1/2-1/2", "fifty move rule"
+            break
+        side = 0 if gs.getWhiteToMove() else 1
+        player = players[side]
+        loadedTables = loadTables(player["tables"], loadedTables)
+        searchGs = GameState.fromFen(fen)
+        for move in gs.getMoveLog():    #Replayed rather than loaded from the current FEN so the search sees the repetition history
+            searchGs.makeMove(move)
+        searcher = searchers[side]
+        maxDepth = player["depth"] if player["timeLimit"] is None and player["nodeLimit"] is None else ChessAI.MAX_DEPTH
+        startTime = time.perf_counter()
+        move = searcher.iterativeDeepening(searchGs, searchGs.getValidMoves(), maxDepth, player["timeLimit"], player["nodeLimit"])
+        if move is None:    #Can't happen with legal moves left, but one bad search shouldn't take down the whole pool
+            move = validMoves[0]
+        moveTimes[side].append(time.perf_counter() - startTime)
+        stats = searcher.getStats()
+        nodes[side] += stats.nodes
+        searchSeconds[side] += stats.seconds
+        move = gs.getMoveFromID(move.getMoveID())
+        moves.append(toSan(gs, move, validMoves))
+        gs.makeMove(move)
+    return {"game": gameIndex, "fen": fen, "white": white["name"], "black": black["name"], "result": result, "termination": termination,
+            "moves": moves, "moveTimes": {white["name"]: moveTimes[0], black["name"]: moveTimes[1]},
+            "nodes": {white["name"]: nodes[0], black["name"]: nodes[1]},
+            "searchSeconds": {white["name"]: searchSeconds[0], black["name"]: searchSeconds[1]}}
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+#Elo difference for a score fraction, with the 95% margin from the spread of the game results.
+#Both are None when one side won or lost every game, there is no finite estimate then
+def eloEstimate(scores):
+    games = len(scores)
+    score = sum(scores) / games
+    if score <= 0 or score >= 1:
+        return None, None
+    elo = -400 * math.log10(1 / score - 1)
+    deviation = math.sqrt(sum((s - score) ** 2 for s in scores) / games / games)
+    low = min(max(score - 1.96 * deviation, 1e-9), 1 - 1e-9)
+    high = min(max(score + 1.96 * deviation, 1e-9), 1 - 1e-9)
+    margin = (-400 * math.log10(1 / high - 1) + 400 * math.log10(1 / low - 1)) / 2
+    return elo, margin
+
+def summarize(games, playerA, playerB):     #Results from playerA's side
+    scores = []
+    wins = draws = losses = 0
+    for game in games:
+        if game["result"] == "1/2-1/2":
+            draws += 1
+            scores.append(0.5)
+        elif (game["result"] == "1-0") == (game["white"] == playerA["name"]):
+            wins += 1
+            scores.append(1)
+        else:
+            losses += 1
+            scores.append(0)
+    elo, margin = eloEstimate(scores)
+    summary = {"playerA": playerA, "playerB": playerB, "games": len(games), "wins": wins, "draws": draws, "losses": losses,
+               "score": sum(scores) / len(scores), "elo": elo, "eloMargin": margin, "players": {}}
+    for player in (playerA, playerB):
+        name = player["name"]
+        moveTimes = [moveTime for game in games for moveTime in game["moveTimes"][name]]
+        nodes = sum(game["nodes"][name] for game in games)
+        seconds = sum(game["searchSeconds"][name] for game in games)
+        summary["players"][name] = {"nodesPerSecond": nodes / seconds if seconds else 0, "moveTimeMean": sum(moveTimes) / len(moveTimes) if moveTimes else 0,
+                                    "moveTimeP50": percentile(moveTimes, 0.5), "moveTimeP90": percentile(moveTimes, 0.9),
+                                    "moveTimeP99": percentile(moveTimes, 0.99), "moveTimeMax": max(moveTimes) if moveTimes else 0}
+    return summary
+
+def toPgn(game):
+    lines = ['[Event "Self-play"]', '[Round "%d"]' % (game["game"] + 1), '[White "%s"]' % game["white"], '[Black "%s"]' % game["black"],
+             '[Result "%s"]' % game["result"], '[SetUp "1"]', '[FEN "%s"]' % game["fen"], '[Termination "%s"]' % game["termination"], ""]
+    whiteToMove = game["fen"].split()[1] == "w"
+    moveNumber = int(game["fen"].split()[5])
+    text = []
+    for i, san in enumerate(game["moves"]):
+        if whiteToMove:
+            text.append("%d. %s" % (moveNumber, san))
+        else:
+            text.append(("%d... %s" % (moveNumber, san)) if i == 0 else san)
+            moveNumber += 1
+        whiteToMove = not whiteToMove
+    text.append(game["result"])
+    lines.append(" ".join(text))
+    return "\n".join(lines) + "\n"
+
+#Plays games rounds of every opening with both colors, returns the summary and writes the PGN and JSON if given paths
+def runTournament(playerA, playerB, games = len(OPENINGS) * 2, processes = None, pgnPath = None, jsonPath = None):
+    fens = [openingPosition(opening) for opening in OPENINGS]
+    schedule = []
+    for gameIndex in range(games):
+        fen = fens[(gameIndex // 2) % len(fens)]
+        white, black = (playerA, playerB) if gameIndex % 2 == 0 else (playerB, playerA)
+        schedule.append((gameIndex, fen, white, black))
+    with ProcessPoolExecutor(processes or os.cpu_count() or 1) as pool:
+        results = list(pool.map(playGame, *zip(*schedule)))
+    summary = summarize(results, playerA, playerB)
+    if pgnPath is not None:
+        with open(pgnPath, "w") as file:
+            file.write("\n".join(toPgn(game) for game in results))
+    if jsonPath is not None:
+        with open(jsonPath, "w") as file:
+            json.dump({"summary": summary, "games": results}, file, indent=1, allow_nan=False)   #Infinity and NaN aren't JSON
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Self-play match between two ChessAI configurations")
+    parser.add_argument("--games", type=int, default=len(OPENINGS) * 2)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--pgn", default="tournament.pgn")
+    parser.add_argument("--json", default="tournament.json")
+    for side in ("a", "b"):
+        parser.add_argument("--%s-name" % side, default="engine-" + side)
+        parser.add_argument("--%s-depth" % side, type=int, default=ChessAI.DEPTH)
+        parser.add_argument("--%s-time" % side, type=float, default=None, help="seconds per move")
+        parser.add_argument("--%s-nodes" % side, type=int, default=None, help="nodes per move")
+        parser.add_argument("--%s-tables" % side, default=None, help="eval tables saved with ChessAI.savePieceSquareScores")
+        parser.add_argument("--%s-book" % side, default=None, help="opening book built with ChessBook")
+    args = vars(parser.parse_args())
+    players = [makePlayer(args[side + "_name"], args[side + "_depth"], args[side + "_time"], args[side + "_nodes"], args[side + "_tables"],
+                          args[side + "_book"])
+               for side in ("a", "b")]
+    summary = runTournament(players[0], players[1], args["games"], args["processes"], args["pgn"], args["json"])
+    elo = "%+.0f +/- %.0f" % (summary["elo"], summary["eloMargin"]) if summary["elo"] is not None else "unbounded"
+    print("%s vs %s: +%d =%d -%d, score %.3f, Elo %s" % (players[0]["name"], players[1]["name"], summary["wins"],
+          summary["draws"], summary["losses"], summary["score"], elo))
+    for name, player in summary["players"].items():
+        print("%s: %.0f nodes/sec, move time mean %.3fs p50 %.3fs p90 %.3fs p99 %.3fs max %.3fs" % (name, player["nodesPerSecond"],
+              player["moveTimeMean"], player["moveTimeP50"], player["moveTimeP90"], player["moveTimeP99"], player["moveTimeMax"]))
@@ -0,0 +1,155 @@
+## Name - ChessUCI.py
+## Purpose - Runs the engine without the pygame window, talking UCI over stdin/stdout (python -m ChessUCI)
+## Author - Ryan Brosius
+## Date - 10/18/2026
+
+import sys
+import threading
+import time
+import ChessAI
+import ChessBook
+from ChessEngine import GameState, STARTING_FEN
+
+ENGINE_NAME = "Basic-Chess-AI"
+ENGINE_AUTHOR = "Ryan Brosius"
+MOVE_OVERHEAD = 0.05    #Seconds kept back from every move for the GUI and the pipe
+DEFAULT_MOVES_TO_GO = 30    #Moves the remaining clock is shared over when the GUI doesn't say
+
+class UCIEngine():
+    def __init__(self, output = sys.stdout):
+        self.__output = output
+        self.__gs = GameState()
+        self.__hashSizeMB = ChessAI.HASH_SIZE_MB
+        self.__book = ChessBook.OpeningBook(ChessBook.BOOK_PATH) if ChessBook.BOOK_PATH is not None else None
+        self.__searcher = self.__newSearcher()
+        self.__stop = threading.Event()
+        self.__searchThread = None
+        self.__searchStart = 0
+
+    def __newSearcher(self):
+        searcher = ChessAI.Searcher(ChessAI.TranspositionTable(self.__hashSizeMB), ChessAI.SEARCH_LOG)
+        searcher.setIterationCallback(self.__sendInfo)
+        searcher.setOpeningBook(self.__book)
+        return searcher
+
+    def send(self, line):
+        self.__output.write(line + "\n")
+        self.__output.flush()
+
+    def run(self, input = sys.stdin):
+        for line in input:
+            if not self.handle(line):
+                break
+        self.stopSearch()
+
+    def handle(self, line):     #Handles one command, returns False once the GUI says quit
+        tokens = line.split()
+        if not tokens:
+            return True
+        command = tokens[0]
+        if command == "uci":
+            self.send("id name " + ENGINE_NAME)
+            self.send("id author " + ENGINE_AUTHOR)
+            self.send("option name Hash type spin default %d min 1 max 4096" % ChessAI.HASH_SIZE_MB)
+            self.send("option name BookFile type string default %s" % (ChessBook.BOOK_PATH or "<empty>"))
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self.setOption(tokens)
+        elif command == "ucinewgame":
+            self.stopSearch()
+            self.__searcher = self.__newSearcher()
+            self.__gs = GameState()
+        elif command == "position":
+            self.stopSearch()
+            self.setPosition(tokens)
+        elif command == "go":
+            self.stopSearch()
+            self.go(tokens)
+        elif command == "stop":
+            self.stopSearch()
+        elif command == "quit":
+            return False
+        return True
+
+    def setOption(self, tokens):    #setoption name Hash value 64
+        if "name" in tokens and "value" in tokens:
+            name = " ".join(tokens[tokens.index("name") + 1: tokens.index("value")])
+            value = " ".join(tokens[tokens.index("value") + 1:])
+            if name.lower() == "hash":
+                self.stopSearch()
+                self.__hashSizeMB = max(1, int(value))
+                self.__searcher = self.__newSearcher()
+            elif name.lower() == "bookfile":
+                self.stopSearch()
+                if self.__book is not None:
+                    self.__book.close()
+                self.__book = ChessBook.OpeningBook(value) if value and value != "<empty>" else None
+                self.__searcher.setOpeningBook(self.__book)
+
+    def setPosition(self, tokens):  #position startpos|fen <fen> [moves e2e4 e7e5 ...]
+        movesIndex = tokens.index("moves") if "moves" in tokens else len(tokens)
+        if len(tokens) > 1 and tokens[1] == "fen":
+            self.__gs = GameState.fromFen(" ".join(tokens[2:movesIndex]))
+        else:
+            self.__gs = GameState(STARTING_FEN)
+        for notation in tokens[movesIndex + 1:]:
+            move = self.findMove(notation)
+            if move is None:
+                break   #Illegal move from the GUI, keep the position up to the last good move
+            self.__gs.makeMove(move)
+
+    def findMove(self, notation):
+        for move in self.__gs.getValidMoves():
+            if move.getChessNotation() == notation:
+                return move
+        return None
+
+    def go(self, tokens):   #go [depth n] [nodes n] [movetime ms] [wtime ms btime ms winc ms binc ms movestogo n] [infinite]
+        options = {}
+        for i in range(1, len(tokens) - 1):
+            if tokens[i + 1].lstrip("-").isdigit():
+                options[tokens[i]] = int(tokens[i + 1])
+        maxDepth = min(options.get("depth", ChessAI.MAX_DEPTH), ChessAI.MAX_DEPTH)
+        nodeLimit = options.get("nodes")
+        timeLimit = None
+        if "movetime" in options:
+            timeLimit = max(0.01, options["movetime"] / 1000 - MOVE_OVERHEAD)
+        else:
+            clock, increment = ("wtime", "winc") if self.__gs.getWhiteToMove() else ("btime", "binc")
+            if clock in options:
+                remaining = options[clock] / 1000
+                timeLimit = remaining / max(1, options.get("movestogo", DEFAULT_MOVES_TO_GO)) + options.get(increment, 0) / 1000 * 0.8
+                timeLimit = max(0.01, min(timeLimit, remaining / 2) - MOVE_OVERHEAD)
+        self.__stop.clear()
+        self.__searchStart = time.perf_counter()
+        infinite = "infinite" in tokens
+        self.__searchThread = threading.Thread(target=self.search, args=(self.__gs, maxDepth, timeLimit, nodeLimit, infinite), daemon=True)
+        self.__searchThread.start()
+
+    def search(self, gs, maxDepth, timeLimit, nodeLimit, infinite = False):   #Runs on the search thread
+        move = self.__searcher.iterativeDeepening(gs, gs.getValidMoves(), maxDepth, timeLimit, nodeLimit, self.__stop)
+        if infinite:    #The search can end on its own (a forced mate, MAX_DEPTH) but bestmove has to wait for stop
+            self.__stop.wait()
+        self.send("bestmove " + (move.getChessNotation() if move is not None else "0000"))
+
+    def stopSearch(self):   #Stops a running search and waits for its bestmove
+        if self.__searchThread is not None:
+            self.__stop.set()
+            self.__searchThread.join()
+            self.__searchThread = None
+
+    def __sendInfo(self, iteration):
+        seconds = time.perf_counter() - self.__searchStart
+        score = iteration["score"]
+        if abs(score) >= ChessAI.CHECKMATE:
+            moves = (len(iteration["pv"]) + 1) // 2
+            scoreText = "mate %d" % (moves if score > 0 else -moves)
+        else:
+            scoreText = "cp %d" % round(score * 10)     #pieceScores has a pawn at 10
+        self.send("info depth %d score %s nodes %d nps %d time %d pv %s" % (iteration["depth"], scoreText, iteration["nodes"],
+                  iteration["nodes"] / seconds if seconds else 0, seconds * 1000, " ".join(iteration["pv"])))
+
+if __name__ == "__main__":
+    UCIEngine().run()
@@ -0,0 +1,116 @@
+## Name - ChessWorker.py
+## Purpose - Long lived engine process that keeps its own GameState and search tables between AI moves
+## Author - Ryan Brosius
+## Date - 10/18/2026
+
+from multiprocessing import Process, Pipe, RawValue
+from ChessEngine import GameState
+import ChessAI
+import ChessProfile
+import ChessBook
+
+#Messages sent to the worker, moves are sent as their moveID instead of pickling the GameState
+NEW_GAME = "newgame"
+MAKE_MOVE = "move"
+UNDO_MOVE = "undo"
+SEARCH = "go"
+QUIT = "quit"
+ERROR = "error"     #Sent back in place of a searchID when the worker can't go on
+
+#Stop flag for one search, passed to iterativeDeepening. Set once the main process has cancelled this search or a
+#later one, so there is no flag to clear between searches and a cancel can't be lost
+class SearchCancel():
+    def __init__(self, cancelledSearch, searchID):
+        self.__cancelledSearch = cancelledSearch
+        self.__searchID = searchID
+
+    def is_set(self):
+        return self.__cancelledSearch.value >= self.__searchID
+
+#Runs in the worker process, the transposition table and history in ChessAI stay warm between searches
+def workerLoop(connection, cancelledSearch):
+    if ChessProfile.PROFILE_DIRECTORY is not None:
+        ChessProfile.profileSearches(ChessProfile.PROFILE_DIRECTORY)
+    if ChessBook.BOOK_PATH is not None:
+        ChessAI.getDefaultSearcher().setOpeningBook(ChessBook.OpeningBook(ChessBook.BOOK_PATH))
+    gs = GameState()
+    while True:
+        message = connection.recv()
+        command = message[0]
+        if command == NEW_GAME:
+            gs = GameState()
+        elif command == MAKE_MOVE:
+            move = gs.getMoveFromID(message[1])
+            if move is None:    #Boards no longer match, every later search would be on the wrong position
+                connection.send((ERROR, "move %d isn't legal in %s" % (message[1], gs.toFen()), None))
+                break
+            gs.makeMove(move)
+        elif command == UNDO_MOVE:
+            gs.undoMove()
+        elif command == SEARCH:
+            searchID, timeLimit, nodeLimit = message[1], message[2], message[3]
+            if connection.poll():   #Another message is already waiting, so this search was cancelled before it started
+                connection.send((searchID, 0, None))
+                continue
+            maxDepth = ChessAI.DEPTH if timeLimit is None and nodeLimit is None else ChessAI.MAX_DEPTH
+            move = ChessAI.iterativeDeepening(gs, gs.getValidMoves(), maxDepth, timeLimit, nodeLimit,
+                                              SearchCancel(cancelledSearch, searchID))
+            connection.send((searchID, move.getMoveID() if move is not None else 0, ChessAI.getDefaultSearcher().getStats().toDict()))
+        elif command == QUIT:
+            break
+
+#Handle used by the main process, mirror every move made on the real board with makeMove/undoMove
+class EngineWorker():
+    def __init__(self):
+        self.__connection, workerConnection = Pipe()
+        self.__cancelledSearch = RawValue("q", 0)   #Highest searchID cancelled, only written by this process
+        self.__process = Process(target=workerLoop, args=(workerConnection, self.__cancelledSearch), daemon=True)
+        self.__process.start()
+        self.__searchID = 0
+        self.__searching = False
+        self.__lastStats = None
+
+    def newGame(self):
+        self.stop()
+        self.__connection.send((NEW_GAME,))
+
+    def makeMove(self, move):
+        self.__connection.send((MAKE_MOVE, move.getMoveID()))
+
+    def undoMove(self):
+        self.stop()
+        self.__connection.send((UNDO_MOVE,))
+
+    def startSearch(self, timeLimit = None, nodeLimit = None):
+        self.__searchID += 1
+        self.__searching = True
+        self.__connection.send((SEARCH, self.__searchID, timeLimit, nodeLimit))
+
+    def stop(self):     #Cancels the current search, its result is thrown away
+        if self.__searching:
+            self.__cancelledSearch.value = self.__searchID
+            self.__searching = False
+
+    def isSearching(self):
+        return self.__searching
+
+    def getLastStats(self):     #SearchStats.toDict() of the last search that finished, or None
+        return self.__lastStats
+
+    #Returns the moveID the search found (0 if it found nothing), or None while it is still thinking
+    def getBestMoveID(self):
+        while self.__connection.poll():
+            searchID, moveID, stats = self.__connection.recv()
+            if searchID == ERROR:
+                raise RuntimeError("Engine worker stopped: " + moveID)
+            if searchID == self.__searchID and self.__searching:
+                self.__searching = False
+                self.__lastStats = stats
+                return moveID
+        return None
+
+    def close(self):
+        self.stop()
+        if self.__process.is_alive():
+            self.__connection.send((QUIT,))
+        self.__process.join()